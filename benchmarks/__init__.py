@@ -0,0 +1,3 @@
+"""
+Benchmarks for the ga package, run with python -m benchmarks.run.
+"""
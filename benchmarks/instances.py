@@ -0,0 +1,35 @@
+import os
+
+from ga.instances import instance_distances, read_tsplib
+
+#benchmark instances
+#TSPLIB files in benchmarks/data, read with ga.instances. The distances follow
+#the TSPLIB rounding rules, so tour lengths are comparable with the published
+#optimal values.
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+#published optimal tour lengths; instances without a bundled file (berlin52,
+#kroA100) are used when their .tsp file is dropped into DATA_DIR
+OPTIMA = {
+    "gr17": 2085,
+    "berlin52": 7542,
+    "kroA100": 21282,
+    "pcb442": 50778,
+    "att532": 27686,
+}
+
+
+def available(names=None):
+    """
+    Bundled instance names, in the order of OPTIMA, optionally filtered.
+    """
+    found = [name for name in OPTIMA if os.path.exists(os.path.join(DATA_DIR, name + ".tsp"))]
+    return found if names is None else [name for name in found if name in names]
+
+
+def load(name):
+    """
+    Distance matrix and optimal length of a bundled instance.
+    """
+    return instance_distances(read_tsplib(os.path.join(DATA_DIR, name + ".tsp"))), OPTIMA[name]
@@ -0,0 +1,268 @@
+"""
+Headless benchmark suite: operator microbenchmarks, end-to-end TSP runs on
+the TSPLIB instances in benchmarks/data and string GA runs.
+
+    python -m benchmarks.run --output results.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json
+    python -m benchmarks.run --quick --save-baseline benchmarks/baseline.json
+    python -m benchmarks.run --only tsp --profile --output profile.json
+
+Timings are the best of several repeats. Comparing against a baseline flags
+every timing that got slower by more than --tolerance and every end-to-end
+run whose result got worse; the exit status is 1 when anything is flagged.
+Baselines are only comparable on the machine that recorded them. With
+--profile every end-to-end run also records its time per operator.
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import timeit
+
+import numpy as np
+
+import ga.strings as strings
+from benchmarks import instances
+from ga.crossover import crossover_batch
+from ga.distance import distance_matrix
+from ga.mutation import MUTATIONS, mutate
+from ga.population import random_population
+from ga.profiling import Profiler
+from ga.rng import make_rng
+from ga.selection import roulette_wheel
+from ga.tsp import fitness_prob, make_offspring, run_batch, run_ga
+
+#sizes as (n_population, n_cities) for the TSP operators and
+#(POP_SIZE, target length) for the string GA operators
+SIZES = [(250, 10), (1000, 100), (4000, 500)]
+QUICK_SIZES = [(250, 10), (1000, 100)]
+STRING_SIZES = [(500, 16), (2000, 256), (8000, 1024)]
+QUICK_STRING_SIZES = [(500, 16), (2000, 256)]
+#gaps to the optimum, as fractions, whose time to reach is reported
+QUALITY_GAPS = [0.5, 0.25, 0.1, 0.05]
+STRING_TARGET_LENGTHS = [8, 32, 128]
+#small random instances of the TSP batch benchmark, as (count, fewest cities, most cities)
+BATCH_INSTANCES = (500, 8, 30)
+#targets of the batch benchmark and their longest length, short targets being
+#what batch mode is for, and its generation limit
+N_BATCH_TARGETS = 100
+BATCH_TARGET_LENGTH = 32
+BATCH_GENERATIONS = 1000
+
+
+def measure(function, repeat=5, min_time=0.05):
+    """
+    Best time of one call of function, over repeat rounds of as many calls as
+    fit in min_time.
+    """
+    timer = timeit.Timer(function)
+    number = 1
+    while timer.timeit(number) < min_time and number < 10**6:
+        number *= 4
+    return min(timer.repeat(repeat, number)) / number
+
+
+def operator_benchmarks(sizes, string_sizes):
+    results = {}
+    for n_population, n_cities in sizes:
+        rng = make_rng(0)
+        dist = distance_matrix(rng.random((n_cities, 2)))
+        population = random_population(n_cities, n_population, rng=rng)
+        probs = fitness_prob(population, dist)
+        suffix = f"[{n_population}x{n_cities}]"
+
+        results["tsp.fitness_prob" + suffix] = measure(lambda: fitness_prob(population, dist))
+        results["selection.roulette_wheel" + suffix] = measure(lambda: roulette_wheel(probs, n_population, rng))
+        for operator in ("one_point", "ox"):
+            results[f"crossover_batch.{operator}" + suffix] = measure(
+                lambda: crossover_batch(population[0::2], population[1::2], operator, rng))
+        rows = np.arange(n_population)
+        for operator in MUTATIONS:
+            results[f"mutation.{operator}" + suffix] = measure(
+                lambda: mutate(population.copy(), rows, operator, rng, dist))
+        # crossover, evaluation and mutation with length deltas, as run_ga breeds
+        results["tsp.make_offspring" + suffix] = measure(lambda: make_offspring(population, dist, 0.2, rng=rng))
+
+    for pop_size, length in string_sizes:
+        rng = make_rng(0)
+        target = "".join(rng.choice(list(strings.GENES), length))
+        target_codes = strings.encode(target)
+        population = strings.initialize_pop(target, pop_size, rng=rng)
+        fitness = strings.fitness_cal(target_codes, population)
+        selected = population[strings.selection(fitness, pop_size)]
+        offspring = strings.crossover(selected, population, pop_size, rng)
+        new_fitness = strings.fitness_cal(target_codes, offspring)
+        suffix = f"[{pop_size}x{length}]"
+
+        results["strings.fitness_cal" + suffix] = measure(lambda: strings.fitness_cal(target_codes, population))
+        results["strings.selection" + suffix] = measure(lambda: strings.selection(fitness, pop_size))
+        results["strings.crossover" + suffix] = measure(lambda: strings.crossover(selected, population, pop_size, rng))
+        buffers = strings.GenerationBuffers(*population.shape)
+        buffers.population[...], buffers.fitness[...] = population, fitness
+        pool_size = strings.mating_pool_size(pop_size)
+        results["strings.partition" + suffix] = measure(lambda: buffers.partition(pool_size))
+        results["strings.crossover.buffered" + suffix] = measure(
+            lambda: strings.crossover(buffers.population[:pool_size], buffers.population, pop_size, rng, buffers))
+        results["strings.mutate" + suffix] = measure(lambda: strings.mutate(offspring.copy(), 0.2, rng=rng))
+        results["strings.replace" + suffix] = measure(
+            lambda: strings.replace(offspring, new_fitness, population.copy(), fitness.copy(), buffers.better,
+                                    buffers.spare, buffers.spare_fitness))
+    return {name: {"seconds": seconds} for name, seconds in results.items()}
+
+
+def tsp_run(dist, optimum, seed=0, profile=False, **params):
+    """
+    One seeded run_ga, recording when the best tour first came within each of
+    QUALITY_GAPS of the optimum, and its time per operator when profiling.
+    """
+    profiler = Profiler() if profile else None
+    start = time.perf_counter()
+    time_to = {}
+
+    def callback(event):
+        gap = event.fitness / optimum - 1
+        for target in QUALITY_GAPS:
+            if gap <= target and str(target) not in time_to:
+                time_to[str(target)] = time.perf_counter() - start
+
+    result = run_ga(dist, seed=seed, callback=callback, profiler=profiler, **params)
+    seconds = time.perf_counter() - start
+    values = {"seconds": seconds, "generations": result.generations, "best_length": result.best_length,
+              "gap": result.best_length / optimum - 1,
+              "time_to_gap": {str(target): time_to.get(str(target)) for target in QUALITY_GAPS}}
+    if profiler is not None:
+        values["operators"] = profiler.summary()
+    return values
+
+
+def tsp_benchmarks(names=None, n_generations=200, profile=False):
+    configs = {
+        "plain": {"n_population": 250, "n_generations": n_generations},
+        "memetic": {"n_population": 100, "n_generations": n_generations // 4, "crossover_op": "ox",
+                    "memetic": True, "ls_passes": 2},
+    }
+    results = {}
+    for name in instances.available(names):
+        dist, optimum = instances.load(name)
+        for config, params in configs.items():
+            results[f"tsp.{name}.{config}"] = tsp_run(dist, optimum, profile=profile, **params)
+
+    # many small instances in one batched run
+    count, fewest, most = BATCH_INSTANCES
+    rng = make_rng(0)
+    dists = [distance_matrix(rng.random((n_cities, 2))) for n_cities in rng.integers(fewest, most + 1, count)]
+    start = time.perf_counter()
+    batch = run_batch(dists, n_population=100, n_generations=n_generations, seed=0)
+    seconds = time.perf_counter() - start
+    results[f"tsp.run_batch[{count}]"] = {"seconds": seconds, "instances_per_second": count / seconds,
+                                          "best_length": sum(result.best_length for result in batch)}
+    return results
+
+
+def string_benchmarks(lengths=STRING_TARGET_LENGTHS, profile=False):
+    results = {}
+    for length in lengths:
+        rng = make_rng(length)
+        target = "".join(rng.choice(list(strings.GENES), length))
+        profiler = Profiler() if profile else None
+        start = time.perf_counter()
+        result = strings.run_ga(target, seed=0, max_generations=20000, profiler=profiler)
+        results[f"strings.run_ga[{length}]"] = {"seconds": time.perf_counter() - start,
+                                                "generations": result.generation, "fitness": result.fitness}
+        if profiler is not None:
+            results[f"strings.run_ga[{length}]"]["operators"] = profiler.summary()
+
+    rng = make_rng(0)
+    targets = ["".join(rng.choice(list(strings.GENES), length))
+               for length in rng.integers(1, BATCH_TARGET_LENGTH + 1, N_BATCH_TARGETS)]
+    start = time.perf_counter()
+    batch = strings.run_batch(targets, seed=0, max_generations=BATCH_GENERATIONS)
+    results[f"strings.run_batch[{N_BATCH_TARGETS}]"] = {"seconds": time.perf_counter() - start,
+                                                       "generations": max(result.generation for result in batch),
+                                                       "fitness": sum(result.fitness for result in batch)}
+    return results
+
+
+def run(quick=False, only=None, profile=False):
+    groups = {
+        "operators": lambda: operator_benchmarks(QUICK_SIZES if quick else SIZES,
+                                                 QUICK_STRING_SIZES if quick else STRING_SIZES),
+        "tsp": lambda: tsp_benchmarks(["gr17", "berlin52", "kroA100"] if quick else None,
+                                      50 if quick else 200, profile),
+        "strings": lambda: string_benchmarks(STRING_TARGET_LENGTHS[:2] if quick else STRING_TARGET_LENGTHS,
+                                             profile),
+    }
+    results = {}
+    for group, benchmark in groups.items():
+        if only is None or group in only:
+            results.update(benchmark())
+    return {"meta": {"python": platform.python_version(), "numpy": np.__version__,
+                     "machine": platform.machine(), "platform": platform.platform(), "quick": quick,
+                     "time": time.strftime("%Y-%m-%dT%H:%M:%S")},
+            "results": results}
+
+
+def compare(current, baseline, tolerance=0.5, gap_tolerance=0.01):
+    """
+    Regressions of current against baseline: timings more than tolerance
+    slower, and runs whose gap to the optimum or string fitness got worse.
+    Output:
+    List of (name, metric, baseline value, current value)
+    """
+    regressions = []
+    for name, values in current["results"].items():
+        before = baseline["results"].get(name)
+        if before is None:
+            continue
+        if values["seconds"] > before["seconds"] * (1 + tolerance):
+            regressions.append((name, "seconds", before["seconds"], values["seconds"]))
+        if "gap" in values and values["gap"] > before["gap"] + gap_tolerance:
+            regressions.append((name, "gap", before["gap"], values["gap"]))
+        if "fitness" in values and values["fitness"] > before["fitness"]:
+            regressions.append((name, "fitness", before["fitness"], values["fitness"]))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks for the GA operators and end-to-end runs.")
+    parser.add_argument("--quick", action="store_true", help="smaller sizes and fewer generations")
+    parser.add_argument("--only", nargs="+", choices=["operators", "tsp", "strings"], help="benchmark groups to run")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare against the results in this JSON file")
+    parser.add_argument("--save-baseline", help="write the results as the new baseline to this file")
+    parser.add_argument("--profile", action="store_true", help="record the time per operator of end-to-end runs")
+    parser.add_argument("--tolerance", type=float, default=0.5, help="allowed slowdown, 0.5 is 50%%")
+    args = parser.parse_args(argv)
+
+    current = run(args.quick, args.only, args.profile)
+    for name, values in current["results"].items():
+        print(f"{name:48s} {values['seconds'] * 1e3:12.3f} ms" +
+              (f"  gap {values['gap']:.2%}" if "gap" in values else ""))
+        for operator, stats in values.get("operators", {}).items():
+            print(f"    {operator:44s} {stats['seconds'] * 1e3:12.3f} ms  {stats['share']:6.1%}")
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(current, f, indent=2, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline["meta"]["quick"] != current["meta"]["quick"]:
+            parser.error("the baseline was recorded with a different --quick setting")
+        regressions = compare(current, baseline, args.tolerance)
+        for name, metric, before, after in regressions:
+            print(f"REGRESSION {name} {metric}: {before:.6g} -> {after:.6g}")
+        # new benchmarks are not compared until the baseline is recorded again
+        for name in sorted(set(current["results"]) - set(baseline["results"])):
+            print(f"NOT IN BASELINE {name}")
+        if regressions:
+            return 1
+        print("no regressions against", args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,56 @@
+"""
+Headless genetic algorithm engine used by the Streamlit pages.
+
+Names are imported from their submodule on first access, so `import ga` costs
+nothing until something is used and plotting libraries are only loaded by
+ga.plotting. The string matching GA lives in ga.strings.
+"""
+import importlib
+
+_exports = {
+    "ga.cache": ["ResultCache", "cached_distance_matrix", "cached_distances", "cached_run_ga", "cached_string_ga",
+                 "canonical_key", "instance_key"],
+    "ga.checkpoint": ["Checkpointer", "MemoryCheckpointer", "load_checkpoint", "save_checkpoint"],
+    "ga.crossover": ["BATCH_CROSSOVERS", "CROSSOVERS", "crossover_batch", "edge_recombination",
+                     "one_point_crossover", "order_crossover", "order_crossover_batch",
+                     "partially_mapped_crossover"],
+    "ga.distance": ["distance_matrix", "fitness_probabilities", "tour_length", "tour_lengths"],
+    "ga.encoding": ["decode_tour", "encode_tours", "index_dtype"],
+    "ga.instances": ["Instance", "city_names", "instance_distances", "load_instance", "read_csv", "read_npy",
+                     "read_tsplib"],
+    "ga.jobs": ["Job", "JobCancelled", "JobRunner", "JobStatus", "follow", "job_columns", "job_runner"],
+    "ga.local_search": ["improve_offspring", "improve_tour", "neighbour_lists"],
+    "ga.mutation": ["MUTATIONS", "insertion_mutation", "mutate", "neighbour_mutation", "reversal_mutation",
+                    "swap_mutation"],
+    "ga.parallel": ["SharedEvaluator", "migrate", "migrate_by", "run_islands", "run_string_islands"],
+    "ga.population": ["nearest_neighbour_tour", "random_permutations", "random_population"],
+    "ga.profiling": ["Profiler", "streamlit_panel"],
+    "ga.progress": ["GenerationEvent", "History", "StreamlitProgress", "Throttle", "fan_out"],
+    "ga.rng": ["BIT_GENERATORS", "RandomBlock", "get_rng", "make_rng", "spawn"],
+    "ga.selection": ["SELECTIONS", "AliasTable", "alias_method", "get_selection", "roulette_wheel",
+                     "stochastic_universal_sampling", "tournament"],
+    "ga.spatial": ["MAX_MATRIX_CITIES", "DistanceOracle", "knn", "knn_grid"],
+    "ga.termination": ["AnyOf", "DiversityCollapse", "MaxGenerations", "MaxTime", "Stagnation",
+                       "TargetFitness", "diversity"],
+    "ga.tsp": ["GAResult", "run_batch", "run_ga"],
+}
+_submodules = {"cache", "checkpoint", "crossover", "distance", "encoding", "instances", "jobs", "local_search",
+               "mutation", "parallel", "plotting", "population", "profiling", "progress", "rng", "selection",
+               "spatial", "strings", "termination", "tsp"}
+_origin = {name: module for module, names in _exports.items() for name in names}
+
+__all__ = sorted(_origin)
+
+
+def __getattr__(name):
+    if name in _submodules:
+        return importlib.import_module(f"ga.{name}")
+    if name not in _origin:
+        raise AttributeError(f"module 'ga' has no attribute {name!r}")
+    value = getattr(importlib.import_module(_origin[name]), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_origin) | _submodules)
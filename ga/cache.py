@@ -0,0 +1,249 @@
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ga.distance import distance_matrix
+from ga.spatial import MAX_MATRIX_CITIES, DistanceOracle
+from ga.termination import Policy
+
+#result cache
+#GA runs are memoized on a canonical hash of the problem instance, the GA
+#parameters and the RNG seed, in an in-memory LRU with an optional disk tier
+
+def _hash_into(digest, part):
+    if isinstance(part, np.ndarray):
+        part = np.ascontiguousarray(part)
+        digest.update(f"array:{part.dtype.str}:{part.shape}:".encode())
+        digest.update(part.tobytes())
+    elif isinstance(part, dict):
+        digest.update(f"dict:{len(part)}:".encode())
+        for key in sorted(part, key=str):
+            _hash_into(digest, key)
+            _hash_into(digest, part[key])
+    elif isinstance(part, (list, tuple)):
+        digest.update(f"{type(part).__name__}:{len(part)}:".encode())
+        for item in part:
+            _hash_into(digest, item)
+    elif isinstance(part, Policy):
+        # termination policies are hashed by their settings, not their counters
+        _hash_into(digest, [type(part).__name__, {k: v for k, v in vars(part).items() if not k.startswith("_")}])
+    elif part is None or isinstance(part, (str, bool, int, float, np.generic)):
+        digest.update(json.dumps(part.item() if isinstance(part, np.generic) else part).encode())
+    else:
+        raise TypeError(f"cannot build a cache key from {type(part).__name__!r}, "
+                        "pass arrays, strings, numbers, termination policies or containers of them")
+    digest.update(b"|")
+
+
+def canonical_key(*parts):
+    """
+    Stable hash of arrays, strings, numbers, termination policies and dicts,
+    lists and tuples of them, at any depth. Arrays are hashed by dtype, shape
+    and contents; dicts are hashed with sorted keys. Anything else, such as
+    an object only identified by its address, raises TypeError.
+    """
+    digest = hashlib.sha256()
+    for part in parts:
+        _hash_into(digest, part)
+    return digest.hexdigest()
+
+
+def instance_key(coords):
+    """
+    Hash of a city set, independent of how the coordinates were passed in.
+    """
+    return canonical_key(np.asarray(coords, dtype=np.float64).reshape(-1, 2))
+
+
+def _freeze(value):
+    """
+    Read-only copy of an array, or of the arrays inside a namedtuple, so a
+    cached value cannot be changed through the reference handed out.
+    """
+    if isinstance(value, np.ndarray):
+        value = value.copy()
+        value.flags.writeable = False
+    elif isinstance(value, tuple) and hasattr(value, "_fields"):
+        value = value._replace(**{field: _freeze(getattr(value, field)) for field in value._fields})
+    return value
+
+
+class ResultCache:
+    """
+    Two tier LRU cache. The memory tier keeps max_entries values; the optional
+    disk tier pickles values into directory and evicts the least recently
+    used files once they take more than max_bytes.
+    """
+
+    def __init__(self, max_entries=128, directory=None, max_bytes=256 * 2**20):
+        self.max_entries = max_entries
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        if directory is not None:
+            os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + ".pkl")
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key]
+        if self.directory is None:
+            return default
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return default
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        value = _freeze(value)
+        self._remember(key, value)
+        if self.directory is not None:
+            tmp = self._path(key) + f".{os.getpid()}.tmp"
+            with open(tmp, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, self._path(key))
+            self._evict_disk()
+        return value
+
+    def _remember(self, key, value):
+        with self._lock:
+            self._memory[key] = value
+            self._memory.move_to_end(key)
+            while len(self._memory) > self.max_entries:
+                self._memory.popitem(last=False)
+
+    def _evict_disk(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                stat = os.stat(os.path.join(self.directory, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except OSError:
+                pass
+            total -= size
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+        if self.directory is not None:
+            for name in os.listdir(self.directory):
+                if name.endswith(".pkl"):
+                    os.remove(os.path.join(self.directory, name))
+
+    def __contains__(self, key):
+        with self._lock:
+            if key in self._memory:
+                return True
+        return self.directory is not None and os.path.exists(self._path(key))
+
+
+#shared caches, the disk tier is enabled by setting GA_CACHE_DIR
+distance_cache = ResultCache(max_entries=16)
+result_cache = ResultCache(directory=os.environ.get("GA_CACHE_DIR"))
+
+
+def cached_distance_matrix(coords, dtype=np.float64):
+    """
+    Distance matrix of a city set, computed once and reused across GA
+    parameter sets.
+    """
+    key = canonical_key(instance_key(coords), np.dtype(dtype).str)
+    dist = distance_cache.get(key)
+    if dist is None:
+        dist = distance_cache.put(key, distance_matrix(coords, dtype))
+    return dist
+
+
+def cached_distances(coords, dtype=np.float64, max_matrix_cities=MAX_MATRIX_CITIES):
+    """
+    Cached distance matrix of a city set, or a DistanceOracle computing
+    distances on demand when it has more than max_matrix_cities cities.
+    """
+    if len(coords) > max_matrix_cities:
+        return DistanceOracle(coords)
+    return cached_distance_matrix(coords, dtype)
+
+
+def _run_checkpointed(run, key, checkpoint_dir, **params):
+    """
+    Running with checkpoints in checkpoint_dir named after the cache key, so a
+    run interrupted by a rerun continues from where it stopped. The file is
+    removed once the result is cached.
+    """
+    if checkpoint_dir is None:
+        return run(**params)
+    path = os.path.join(checkpoint_dir, key + ".npz")
+    resume_from = path if os.path.exists(path) else None
+    result = run(checkpoint=path, resume_from=resume_from, **params)
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+    return result
+
+
+def _params_key(params):
+    # parameters that do not change the result; an evaluator computes the
+    # same lengths as the distance matrix, only elsewhere
+    return {k: v for k, v in params.items() if k not in ("callback", "checkpoint_every", "profiler", "evaluator")}
+
+
+def cached_run_ga(coords, seed=None, cache=None, checkpoint_dir=None, **params):
+    """
+    TSP run_ga memoized on the city set, the GA parameters and the seed.
+    Input:
+    1- City coordinates, shape (n_cities, 2)
+    2- RNG seed
+    3- Cache to use, the shared result_cache by default
+    4- Directory for checkpoints of runs not cached yet, None for no checkpoints
+    5- Any run_ga parameter; the key leaves out the evaluator, and raises
+       TypeError on values it cannot hash by content, such as a callable selection
+    Output:
+    GAResult, with a read-only population
+    """
+    from ga.tsp import run_ga
+
+    cache = result_cache if cache is None else cache
+    key = canonical_key("tsp", instance_key(coords), _params_key(params), seed)
+    result = cache.get(key)
+    if result is None:
+        result = cache.put(key, _run_checkpointed(run_ga, key, checkpoint_dir, dist=cached_distances(coords),
+                                                  seed=seed, **params))
+    return result
+
+
+def cached_string_ga(TARGET, seed=None, cache=None, checkpoint_dir=None, **params):
+    """
+    String matching run_ga memoized on the target, the GA parameters and the seed.
+    Output:
+    StringResult
+    """
+    from ga.strings import run_ga
+
+    cache = result_cache if cache is None else cache
+    key = canonical_key("strings", TARGET, _params_key(params), seed)
+    result = cache.get(key)
+    if result is None:
+        result = cache.put(key, _run_checkpointed(run_ga, key, checkpoint_dir, TARGET=TARGET, seed=seed, **params))
+    return result
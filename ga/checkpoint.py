@@ -0,0 +1,165 @@
+import json
+import os
+import tempfile
+import threading
+
+import numpy as np
+
+#checkpoints
+#GA state is written to .npz files: the population arrays and fitness as they
+#are, small values (generation, RNG and policy state) as JSON. Writes happen on a background thread so the generation loop only pays
+#for copying the arrays.
+
+def default_directory():
+    """
+    Directory the pages checkpoint into, GA_CHECKPOINT_DIR or a folder in the
+    system temp directory.
+    """
+    return os.environ.get("GA_CHECKPOINT_DIR") or os.path.join(tempfile.gettempdir(), "ga-checkpoints")
+
+
+def _plain(value):
+    # NumPy scalars in policy state, such as a best fitness
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} cannot be written to a checkpoint")
+
+
+def save_checkpoint(path, arrays, meta):
+    """
+    Writing arrays and JSON metadata to path. The file is written next to
+    path and renamed over it, so a reader never sees a partial checkpoint.
+    Input:
+    1- Path of the .npz file
+    2- Dict of name to array
+    3- Dict of JSON serializable values
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        np.savez(f, meta=np.array(json.dumps(meta, default=_plain)), **arrays)
+    os.replace(tmp, path)
+
+
+def load_checkpoint(path):
+    """
+    Reading a checkpoint written by save_checkpoint.
+    Output:
+    1- Dict of name to array
+    2- Dict of metadata
+    """
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in data.files if name != "meta"}
+        meta = json.loads(str(data["meta"]))
+    return arrays, meta
+
+
+class Checkpointer:
+    """
+    Periodic asynchronous checkpoints of a GA run. save() copies the state and
+    hands it to a writer thread; when a write is still running the newest
+    pending state replaces the older one instead of queueing up.
+    Input:
+    1- Path of the .npz file
+    2- Generations between checkpoints
+    """
+
+    def __init__(self, path, every=10):
+        self.path = path
+        self.every = every
+        self._pending = None
+        self._writing = False
+        self._error = None
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def due(self, generation):
+        return self.every and generation % self.every == 0
+
+    def save(self, arrays, meta):
+        state = ({name: np.array(value, copy=True) for name, value in arrays.items()}, dict(meta))
+        with self._condition:
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+            self._pending = state
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._write_loop, daemon=True)
+                self._thread.start()
+            self._condition.notify()
+
+    def _write_loop(self):
+        while True:
+            with self._condition:
+                if self._pending is None:
+                    self._thread = None
+                    self._condition.notify_all()
+                    return
+                state, self._pending = self._pending, None
+                self._writing = True
+            try:
+                save_checkpoint(self.path, *state)
+            except Exception as error:
+                with self._condition:
+                    self._error = error
+            finally:
+                with self._condition:
+                    self._writing = False
+                    self._condition.notify_all()
+
+    def flush(self):
+        """
+        Waiting until every pending checkpoint is on disk.
+        """
+        with self._condition:
+            while self._pending is not None or self._writing:
+                self._condition.wait()
+            if self._error is not None:
+                error, self._error = self._error, None
+                raise error
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class MemoryCheckpointer:
+    """
+    Keeping the last state of a run in memory instead of writing it, for a run
+    continued in pieces, such as an island between migrations. Pass state to
+    run_ga as resume_from to continue the run.
+    Input:
+    1- Generations between saves, None to keep only the final state
+    """
+
+    def __init__(self, every=None):
+        self.every = every
+        self.state = None
+
+    def due(self, generation):
+        return self.every and generation % self.every == 0
+
+    def save(self, arrays, meta):
+        self.state = ({name: np.array(value, copy=True) for name, value in arrays.items()}, dict(meta))
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def checkpointer(checkpoint, every=10):
+    """
+    Checkpointer for a run_ga checkpoint argument: a path, a Checkpointer, a
+    MemoryCheckpointer or None.
+    """
+    if checkpoint is None or isinstance(checkpoint, (Checkpointer, MemoryCheckpointer)):
+        return checkpoint
+    return Checkpointer(checkpoint, every)
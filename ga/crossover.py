@@ -0,0 +1,228 @@
+from functools import partial
+
+import numpy as np
+
+from ga.rng import RandomBlock, get_rng
+
+#crossover
+#every operator takes two parent tours and an optional Generator and returns
+#one child; all of them run in O(n_cities) using visited masks or position
+#arrays instead of list lookups
+
+def random_segment(n_cities, rng=None):
+    """
+    Random slice [start, stop) with at least one city in it.
+    """
+    start, stop = sorted(get_rng(rng).integers(0, n_cities, 2))
+    return start, stop + 1
+
+
+def one_point_crossover(parent_1, parent_2, cut=None, rng=None):
+    """
+    Keeping the first cut cities of parent 1 and appending the remaining
+    cities in the order they appear in parent 2.
+    Input:
+    1- parent 1
+    2- parent 2
+    3- cut point, random when not given
+    Output:
+    child
+    """
+    n_cities = len(parent_1)
+    if cut is None:
+        cut = get_rng(rng).integers(1, n_cities) if n_cities > 1 else 1
+    visited = np.zeros(n_cities, dtype=bool)
+    visited[parent_1[:cut]] = True
+    return np.concatenate([parent_1[:cut], parent_2[~visited[parent_2]]])
+
+
+def order_crossover(parent_1, parent_2, rng=None):
+    """
+    Order crossover (OX1): a random slice of parent 1 keeps its positions and
+    the other cities fill the child in parent 2 order, starting after the slice.
+    Input:
+    1- parent 1
+    2- parent 2
+    Output:
+    child
+    """
+    n_cities = len(parent_1)
+    start, stop = random_segment(n_cities, rng)
+    visited = np.zeros(n_cities, dtype=bool)
+    visited[parent_1[start:stop]] = True
+
+    child = parent_1.copy()
+    rotated = np.roll(parent_2, -stop)
+    fill = rotated[~visited[rotated]]
+    child[(stop + np.arange(len(fill))) % n_cities] = fill
+    return child
+
+
+def partially_mapped_crossover(parent_1, parent_2, rng=None):
+    """
+    PMX: a random slice of parent 1 is copied into parent 2 and the cities it
+    displaces are relocated through the mapping defined by the slice.
+    Input:
+    1- parent 1
+    2- parent 2
+    Output:
+    child
+    """
+    n_cities = len(parent_1)
+    start, stop = random_segment(n_cities, rng)
+    in_segment = np.zeros(n_cities, dtype=bool)
+    in_segment[parent_1[start:stop]] = True
+    position_1 = np.empty(n_cities, dtype=np.intp)
+    position_1[parent_1] = np.arange(n_cities)
+
+    child = parent_2.copy()
+    child[start:stop] = parent_1[start:stop]
+    outside = np.ones(n_cities, dtype=bool)
+    outside[start:stop] = False
+    for i in np.flatnonzero(outside & in_segment[parent_2]):
+        city = parent_2[i]
+        while in_segment[city]:
+            city = parent_2[position_1[city]]
+        child[i] = city
+    return child
+
+
+def edge_recombination(parent_1, parent_2, rng=None, neighbours=None):
+    """
+    Edge recombination (ERX): the child is grown from the union of both
+    parents' edges, always moving to the neighbour with the fewest remaining
+    edges. When it runs out of edges it moves to the closest unvisited
+    candidate neighbour if there is one, and to a random unvisited city otherwise.
+    Input:
+    1- parent 1
+    2- parent 2
+    3- Generator or seed, see ga.rng
+    4- Candidate neighbour lists, shape (n_cities, k), closest first
+    Output:
+    child
+    """
+    n_cities = len(parent_1)
+    edges = [set() for _ in range(n_cities)]
+    for parent in (parent_1.tolist(), parent_2.tolist()):
+        for i, city in enumerate(parent):
+            edges[city].add(parent[i - 1])
+            edges[city].add(parent[(i + 1) % n_cities])
+
+    # unvisited cities in a list with positions, so a random one is O(1)
+    unvisited = list(range(n_cities))
+    position = list(range(n_cities))
+    visited = [False] * n_cities
+
+    def visit(city):
+        visited[city] = True
+        i = position[city]
+        last = unvisited.pop()
+        if last != city:
+            unvisited[i] = last
+            position[last] = i
+        for neighbour in edges[city]:
+            edges[neighbour].discard(city)
+
+    # dead ends need one draw each, taken from a block instead of one Generator call per draw
+    draws = RandomBlock(rng, block_size=64)
+    child = np.empty_like(parent_1)
+    city = int(parent_1[0])
+    for k in range(n_cities):
+        child[k] = city
+        visit(city)
+        if not unvisited:
+            break
+        if edges[city]:
+            city = min(edges[city], key=lambda neighbour: len(edges[neighbour]))
+            continue
+        candidate = None
+        if neighbours is not None:
+            candidate = next((near for near in neighbours[city].tolist() if not visited[near]), None)
+        city = unvisited[draws.integers(len(unvisited))] if candidate is None else candidate
+    return child
+
+
+def order_crossover_batch(parents_1, parents_2, rotate=True, start=None, stop=None, rng=None):
+    """
+    OX1 for many pairs at once, without a Python loop over the pairs.
+    Input:
+    1- first parents, shape (n_pairs, n_cities)
+    2- second parents, same shape
+    3- fill from parent 2 after the slice (OX1) or from its first city
+    4- slice starts, random when not given
+    5- slice stops, random when not given
+    6- Generator or seed, see ga.rng
+    Output:
+    children, same shape as the parents
+    """
+    n_pairs, n_cities = parents_1.shape
+    if start is None:
+        cuts = np.sort(get_rng(rng).integers(0, n_cities, (n_pairs, 2)), axis=1)
+        start, stop = cuts[:, 0], cuts[:, 1] + 1
+    rows = np.arange(n_pairs)[:, None]
+    cols = np.arange(n_cities)[None, :]
+
+    position_1 = np.empty((n_pairs, n_cities), dtype=np.intp)
+    position_1[rows, parents_1] = cols
+    order = parents_2[rows, (cols + stop[:, None]) % n_cities] if rotate else parents_2
+    slice_position = position_1[rows, order]
+    keep = (slice_position < start[:, None]) | (slice_position >= stop[:, None])
+
+    children = parents_1.copy()
+    rank = np.cumsum(keep, axis=1) - 1
+    target = (stop[:, None] + rank) % n_cities
+    children[np.broadcast_to(rows, keep.shape)[keep], target[keep]] = order[keep]
+    return children
+
+
+def one_point_crossover_batch(parents_1, parents_2, rng=None):
+    """
+    One point crossover for many pairs at once.
+    """
+    n_pairs, n_cities = parents_1.shape
+    cut = get_rng(rng).integers(1, n_cities, n_pairs) if n_cities > 1 else np.ones(n_pairs, dtype=int)
+    return order_crossover_batch(parents_1, parents_2, rotate=False, start=np.zeros(n_pairs, dtype=int), stop=cut)
+
+
+CROSSOVERS = {
+    "one_point": one_point_crossover,
+    "ox": order_crossover,
+    "pmx": partially_mapped_crossover,
+    "erx": edge_recombination,
+}
+
+BATCH_CROSSOVERS = {
+    "one_point": one_point_crossover_batch,
+    "ox": order_crossover_batch,
+}
+
+
+def crossover_batch(parents_1, parents_2, operator="ox", rng=None, neighbours=None):
+    """
+    Producing one child per pair of parents with the named operator, using
+    the vectorized version where there is one.
+    Input:
+    1- first parents, shape (n_pairs, n_cities)
+    2- second parents, same shape
+    3- operator name from CROSSOVERS, or a callable taking two parents
+    4- Generator or seed, see ga.rng
+    5- Candidate neighbour lists, used by ERX to repair dead ends
+    Output:
+    children, same shape as the parents
+    """
+    rng = get_rng(rng)
+    if not callable(operator) and operator in BATCH_CROSSOVERS:
+        return BATCH_CROSSOVERS[operator](parents_1, parents_2, rng=rng)
+
+    if callable(operator):
+        cross = operator
+    elif operator == "erx":
+        cross = partial(edge_recombination, rng=rng, neighbours=neighbours)
+    elif operator in CROSSOVERS:
+        cross = partial(CROSSOVERS[operator], rng=rng)
+    else:
+        raise ValueError(f"unknown crossover {operator!r}, expected one of {sorted(CROSSOVERS)}")
+    children = np.empty_like(parents_1)
+    for i in range(len(parents_1)):
+        children[i] = cross(parents_1[i], parents_2[i])
+    return children
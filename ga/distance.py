@@ -0,0 +1,66 @@
+import numpy as np
+
+#distance matrix
+
+def distance_matrix(coords, dtype=np.float64, block_size=1024):
+    """
+    Computing all pairwise euclidean distances once per city set.
+    Input:
+    1- City coordinates, shape (n_cities, 2)
+    2- Output dtype, np.float32 halves the memory for large instances
+    3- Rows computed per block, bounds the temporary arrays
+    Output:
+    Distance matrix of shape (n_cities, n_cities)
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    n_cities = len(coords)
+    dist = np.empty((n_cities, n_cities), dtype=dtype)
+    for start in range(0, n_cities, block_size):
+        block = coords[start:start + block_size]
+        diff = block[:, None, :] - coords[None, :, :]
+        dist[start:start + block_size] = np.sqrt((diff ** 2).sum(axis=2))
+    return dist
+
+
+def tour_lengths(population, dist, chunk_size=4096):
+    """
+    Closed tour length of every individual with one gather and sum.
+    Input:
+    1- Population as integer array of shape (n_population, n_cities)
+    2- Distance matrix
+    3- Individuals per chunk, bounds the gathered temporary array
+    Output:
+    Array of tour lengths, shape (n_population,)
+    """
+    population = np.asarray(population)
+    lengths = np.empty(len(population), dtype=np.float64)
+    for start in range(0, len(population), chunk_size):
+        tours = population[start:start + chunk_size]
+        next_cities = np.roll(tours, -1, axis=1)
+        lengths[start:start + chunk_size] = dist[tours, next_cities].sum(axis=1, dtype=np.float64)
+    return lengths
+
+
+def tour_length(tour, dist):
+    """
+    Closed tour length of a single individual.
+    """
+    tour = np.asarray(tour)
+    return float(dist[tour, np.roll(tour, -1)].sum(dtype=np.float64))
+
+
+def fitness_probabilities(lengths):
+    """
+    Turning tour lengths into selection probabilities, shorter tours get
+    larger shares. A population of equal tours gets uniform probabilities.
+    Input:
+    1- Tour lengths
+    Output:
+    Population fitness probability
+    """
+    lengths = np.asarray(lengths, dtype=np.float64)
+    population_fitness = lengths.max() - lengths
+    population_fitness_sum = population_fitness.sum()
+    if population_fitness_sum <= 0:
+        return np.full(len(lengths), 1.0 / len(lengths))
+    return population_fitness / population_fitness_sum
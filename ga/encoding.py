@@ -0,0 +1,33 @@
+import numpy as np
+
+#integer encoding of tours
+
+def index_dtype(n_cities):
+    """
+    Smallest unsigned integer dtype able to hold every city index.
+    """
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if n_cities - 1 <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.uint64)
+
+
+def encode_tours(tours, cities):
+    """
+    Mapping tours of city names to an integer population array.
+    Input:
+    1- Tours as lists of city names
+    2- Cities list, defines the index of every city
+    Output:
+    Array of shape (n_tours, n_cities)
+    """
+    city_index = {city: i for i, city in enumerate(cities)}
+    encoded = [[city_index[city] for city in tour] for tour in tours]
+    return np.array(encoded, dtype=index_dtype(len(cities))).reshape(len(encoded), -1)
+
+
+def decode_tour(tour, cities):
+    """
+    Mapping a tour of city indices back to city names.
+    """
+    return [cities[i] for i in tour]
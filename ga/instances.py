@@ -0,0 +1,250 @@
+import csv
+import io
+import math
+import os
+from collections import namedtuple
+
+import numpy as np
+
+from ga.distance import distance_matrix
+
+#instance I/O
+#city sets are read from TSPLIB .tsp files, CSV files and .npy coordinate
+#arrays without going through Python lists: numeric sections are parsed by
+#numpy straight from the file, and .npy files are memory-mapped so large
+#inputs are paged in on demand instead of copied.
+
+#a loaded city set: coordinates of shape (n_cities, 2) or None for explicit
+#TSPLIB instances, city names or None for numbered cities, the explicit
+#distance matrix or None, and the TSPLIB edge weight type, None for plain
+#euclidean distances
+Instance = namedtuple("Instance", ["name", "coords", "names", "dist", "edge_weight_type"])
+
+#TSPLIB edge weight types whose distances are computed from coordinates
+COORD_WEIGHT_TYPES = ("EUC_2D", "CEIL_2D", "ATT")
+
+
+def _open_text(source):
+    """
+    Text stream for a path, a text stream or a binary stream such as a
+    Streamlit upload, and the function that releases it without closing a
+    stream the caller passed in.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        f = open(source)
+        return f, f.close
+    if isinstance(source, io.TextIOBase):
+        return source, lambda: None
+    f = io.TextIOWrapper(source, encoding="utf-8")
+    return f, f.detach
+
+
+def _source_name(source):
+    name = getattr(source, "name", source)
+    return os.path.splitext(os.path.basename(str(name)))[0]
+
+
+def _read_numbers(f, count):
+    """
+    Next count numbers of a whitespace separated section, however they are
+    split over lines.
+    """
+    values = np.empty(count)
+    filled = 0
+    while filled < count:
+        line = f.readline()
+        if not line:
+            raise ValueError(f"expected {count} numbers, the file ended after {filled}")
+        row = np.array(line.split(), dtype=np.float64)
+        values[filled:filled + len(row)] = row[:count - filled]
+        filled += len(row)
+    return values
+
+
+def read_tsplib(source):
+    """
+    Reading a symmetric TSPLIB instance. The header is read line by line and
+    the coordinate or weight section is parsed by numpy in one pass.
+    Supports NODE_COORD_SECTION with EUC_2D, CEIL_2D or ATT distances and
+    EDGE_WEIGHT_SECTION in FULL_MATRIX, LOWER_DIAG_ROW or UPPER_ROW format.
+    Input:
+    1- Path or open file
+    Output:
+    Instance
+    """
+    f, release = _open_text(source)
+    try:
+        header = {}
+        coords = dist = None
+        while True:
+            line = f.readline()
+            if not line:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("EOF"):
+                break
+            keyword = line.split(":", 1)[0].strip()
+            if keyword == "NODE_COORD_SECTION":
+                n_cities = int(header["DIMENSION"])
+                coords = np.loadtxt(f, usecols=(1, 2), max_rows=n_cities, ndmin=2)
+            elif keyword == "EDGE_WEIGHT_SECTION":
+                dist = explicit_matrix(f, int(header["DIMENSION"]), header.get("EDGE_WEIGHT_FORMAT", "FULL_MATRIX"))
+            elif ":" in line and not keyword.endswith("SECTION"):
+                header[keyword] = line.split(":", 1)[1].strip()
+    finally:
+        release()
+
+    weight_type = header.get("EDGE_WEIGHT_TYPE", "EUC_2D")
+    if weight_type != "EXPLICIT" and weight_type not in COORD_WEIGHT_TYPES:
+        raise ValueError(f"unsupported EDGE_WEIGHT_TYPE {weight_type!r}")
+    if coords is None and dist is None:
+        raise ValueError("the file has neither a NODE_COORD_SECTION nor an EDGE_WEIGHT_SECTION")
+    return Instance(header.get("NAME", _source_name(source)), coords, None, dist, weight_type)
+
+
+def explicit_matrix(f, n_cities, weight_format):
+    """
+    Symmetric distance matrix from the EDGE_WEIGHT_SECTION of an open file.
+    """
+    if weight_format == "FULL_MATRIX":
+        return _read_numbers(f, n_cities * n_cities).reshape(n_cities, n_cities)
+    if weight_format == "LOWER_DIAG_ROW":
+        rows, cols = np.tril_indices(n_cities)
+    elif weight_format == "UPPER_ROW":
+        rows, cols = np.triu_indices(n_cities, k=1)
+    else:
+        raise ValueError(f"unsupported EDGE_WEIGHT_FORMAT {weight_format!r}")
+    weights = _read_numbers(f, len(rows))
+    dist = np.zeros((n_cities, n_cities))
+    dist[rows, cols] = weights
+    dist[cols, rows] = weights
+    return dist
+
+
+def read_csv(source, x="x", y="y", name=None, delimiter=","):
+    """
+    Reading coordinates from a CSV file. With a header row the x, y and
+    optional name columns are looked up by name; without one the first two
+    columns are x and y.
+    Input:
+    1- Path or open file
+    2- Name of the x column
+    3- Name of the y column
+    4- Name of the column holding city names, "name" when the file has
+       that column and numbered cities otherwise
+    5- Field delimiter
+    Output:
+    Instance
+    """
+    f, release = _open_text(source)
+    try:
+        first = f.readline()
+        fields = next(csv.reader([first], delimiter=delimiter))
+        try:
+            np.array(fields[:2], dtype=np.float64)
+            has_header = False
+        except ValueError:
+            has_header = True
+
+        if not has_header:
+            rows = [np.array(fields[:2], dtype=np.float64)]
+            coords = np.loadtxt(f, delimiter=delimiter, usecols=(0, 1), ndmin=2)
+            return Instance(_source_name(source), np.vstack(rows + [coords]) if len(coords) else np.array(rows),
+                            None, None, None)
+
+        columns = [field.strip() for field in fields]
+        try:
+            usecols = (columns.index(x), columns.index(y))
+        except ValueError:
+            raise ValueError(f"columns {x!r} and {y!r} are required, the file has {columns}") from None
+        if name is None and "name" in columns:
+            name = "name"
+        if name is None:
+            coords = np.loadtxt(f, delimiter=delimiter, usecols=usecols, ndmin=2)
+            names = None
+        else:
+            name_column = columns.index(name)
+            names, coords = [], []
+            for row in csv.reader(f, delimiter=delimiter):
+                if row:
+                    names.append(row[name_column])
+                    coords.append((float(row[usecols[0]]), float(row[usecols[1]])))
+            coords = np.array(coords, dtype=np.float64).reshape(-1, 2)
+    finally:
+        release()
+    return Instance(_source_name(source), coords, names, None, None)
+
+
+def read_npy(source, mmap=True):
+    """
+    Reading an (n_cities, 2) coordinate array saved with np.save. Paths are
+    memory-mapped read-only unless mmap is False.
+    """
+    mmap_mode = "r" if mmap and isinstance(source, (str, os.PathLike)) else None
+    coords = np.load(source, mmap_mode=mmap_mode, allow_pickle=False)
+    if coords.ndim != 2 or coords.shape[1] != 2:
+        raise ValueError(f"expected coordinates of shape (n_cities, 2), got {coords.shape}")
+    return Instance(_source_name(source), coords, None, None, None)
+
+
+READERS = {
+    ".tsp": read_tsplib,
+    ".csv": read_csv,
+    ".txt": read_csv,
+    ".npy": read_npy,
+}
+
+
+def load_instance(source, format=None, **kwargs):
+    """
+    Reading a city set, picking the reader from the file extension.
+    Input:
+    1- Path or open file; open files need a name attribute or format
+    2- Extension of the format, such as ".tsp", when it cannot be taken from the name
+    3- Any reader parameter
+    Output:
+    Instance
+    """
+    if format is None:
+        format = os.path.splitext(str(getattr(source, "name", source)))[1]
+    try:
+        reader = READERS[format.lower()]
+    except KeyError:
+        raise ValueError(f"unknown instance format {format!r}, expected one of {sorted(READERS)}") from None
+    return reader(source, **kwargs)
+
+
+def nint(values):
+    # TSPLIB rounds halves up, np.rint would round them to even
+    return np.floor(values + 0.5)
+
+
+def instance_distances(instance, dtype=np.float64):
+    """
+    Distance matrix of an instance, following the TSPLIB rounding rules of
+    its edge weight type so tour lengths match published optima.
+    """
+    if instance.dist is not None:
+        return instance.dist.astype(dtype, copy=False)
+    dist = distance_matrix(instance.coords, dtype)
+    if instance.edge_weight_type == "EUC_2D":
+        dist[...] = nint(dist)
+    elif instance.edge_weight_type == "CEIL_2D":
+        np.ceil(dist, out=dist)
+    elif instance.edge_weight_type == "ATT":
+        pseudo = dist / math.sqrt(10.0)
+        rounded = nint(pseudo)
+        dist[...] = np.where(rounded < pseudo, rounded + 1, rounded)
+    return dist
+
+
+def city_names(instance):
+    """
+    Names of the cities, their 1-based numbers when the file has none.
+    """
+    if instance.names is not None:
+        return list(instance.names)
+    n_cities = len(instance.coords) if instance.coords is not None else len(instance.dist)
+    return [str(i + 1) for i in range(n_cities)]
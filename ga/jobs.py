@@ -0,0 +1,251 @@
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from ga.progress import History, fan_out
+
+#background jobs
+#GA runs are submitted to a bounded thread pool shared by every page and
+#session, and submit() returns a job id at once. A job records the latest
+#GenerationEvent of its run, so pages poll partial results instead of blocking
+#on the run, and a rerun of the page picks the same job up again. Cancelling
+#stops a run at the end of its current generation; runs with checkpoints
+#continue from there when submitted again.
+
+QUEUED, RUNNING, DONE, CANCELLED, FAILED = "queued", "running", "done", "cancelled", "failed"
+FINISHED = (DONE, CANCELLED, FAILED)
+
+#what polling a job returns: its id and state, the latest GenerationEvent or
+#None before the first generation, the run's result once done and the
+#exception of a failed run
+JobStatus = namedtuple("JobStatus", ["id", "state", "event", "result", "error"])
+
+
+class JobCancelled(Exception):
+    """
+    Raised inside a cancelled run from its progress callback.
+    """
+
+
+class Job:
+    """
+    One submitted run. Called with each GenerationEvent of the run, it records
+    the event and raises JobCancelled once the job has been cancelled.
+    """
+
+    def __init__(self, job_id, key=None, maxlen=1000):
+        self.id = job_id
+        self.key = key
+        self.state = QUEUED
+        self.event = None
+        self.result = None
+        self.error = None
+        self.history = History(maxlen)
+        self.future = None
+        # submitters sharing the job, it is cancelled when the last one cancels
+        self.followers = 1
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        if self._cancelled.is_set():
+            raise JobCancelled(self.id)
+        with self._lock:
+            self.event = event
+            self.history(event)
+
+    @property
+    def done(self):
+        return self.state in FINISHED
+
+    def start(self):
+        with self._lock:
+            if self._cancelled.is_set():
+                self.state = CANCELLED
+                return False
+            self.state = RUNNING
+            return True
+
+    def finish(self, state, result=None, error=None):
+        with self._lock:
+            self.state, self.result, self.error = state, result, error
+
+    def cancel(self):
+        self._cancelled.set()
+        if self.future is not None and self.future.cancel():
+            self.finish(CANCELLED)
+
+    def status(self):
+        with self._lock:
+            return JobStatus(self.id, self.state, self.event, self.result, self.error)
+
+    def columns(self):
+        """
+        Generations and fitness recorded so far, see ga.progress.History.
+        """
+        with self._lock:
+            return self.history.columns()
+
+
+class JobRunner:
+    """
+    Bounded pool of worker threads running GA jobs. Jobs with the same key
+    share one run while it is queued or running, so identical requests from
+    several sessions cost one run; a shared run stops only once every session
+    that submitted it has cancelled it. Finished jobs are kept for polling until
+    more than max_finished have finished.
+    Input:
+    1- Maximum number of runs at once, the CPU count less one by default
+    2- Number of finished jobs kept
+    """
+
+    def __init__(self, max_workers=None, max_finished=64):
+        self.max_workers = max_workers or max(1, (os.cpu_count() or 2) - 1)
+        self.max_finished = max_finished
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._pool = None
+
+    def submit(self, run, *args, key=None, **kwargs):
+        """
+        Queueing run(*args, callback=..., **kwargs). A callback given in
+        kwargs still receives every event, from the worker thread.
+        Input:
+        1- Function taking a callback keyword, such as ga.tsp.run_ga or
+           ga.cache.cached_run_ga
+        2- Its arguments
+        3- Key identifying the request, to share a run with identical requests;
+           None for a run of its own, such as one whose kwargs hold a profiler
+        Output:
+        Job id
+        """
+        with self._lock:
+            if key is not None:
+                for job in self._jobs.values():
+                    if job.key == key and not job.done:
+                        job.followers += 1
+                        return job.id
+            job = Job(uuid.uuid4().hex, key)
+            self._jobs[job.id] = job
+            self._prune()
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="ga-job")
+            job.future = self._pool.submit(self._run, job, run, args, kwargs)
+        return job.id
+
+    def _run(self, job, run, args, kwargs):
+        if not job.start():
+            return
+        callback = fan_out(job, kwargs.pop("callback", None))
+        try:
+            result = run(*args, callback=callback, **kwargs)
+        except JobCancelled:
+            job.finish(CANCELLED)
+        except Exception as error:
+            job.finish(FAILED, error=error)
+        else:
+            job.finish(DONE, result)
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.done]
+        for job_id in finished[:max(0, len(finished) - self.max_finished)]:
+            del self._jobs[job_id]
+
+    def job(self, job_id):
+        """
+        Job with the given id, None when it is unknown or was pruned.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def status(self, job_id):
+        """
+        JobStatus of a job, None when it is unknown or was pruned.
+        """
+        job = self.job(job_id)
+        return None if job is None else job.status()
+
+    def cancel(self, job_id):
+        """
+        Cancelling a job for one of the submitters sharing it. The run goes on
+        while other submitters still follow it.
+        Output:
+        True when the job is cancelled, False when it is unknown or still followed
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return False
+            job.followers -= 1
+            if job.followers > 0:
+                return False
+        job.cancel()
+        return True
+
+    def statuses(self):
+        with self._lock:
+            jobs = list(self._jobs.values())
+        return [job.status() for job in jobs]
+
+    def shutdown(self, cancel=True):
+        """
+        Stopping the pool, cancelling unfinished jobs first unless cancel is False.
+        """
+        with self._lock:
+            jobs, pool, self._pool = list(self._jobs.values()), self._pool, None
+        if cancel:
+            for job in jobs:
+                job.cancel()
+        if pool is not None:
+            pool.shutdown(wait=True)
+
+
+def follow(job_id, callback=None, runner=None, interval=0.25, timeout=None):
+    """
+    Polling a job until it finishes, forwarding each new event to callback on
+    the calling thread, so Streamlit elements can be updated from it. Polling
+    skips generations, job_columns gives every one recorded.
+    Input:
+    1- Job id
+    2- Callback receiving GenerationEvents, such as ga.progress.StreamlitProgress
+    3- JobRunner, the shared job_runner by default
+    4- Seconds between polls
+    5- Seconds to wait at most, None for no limit
+    Output:
+    Last JobStatus, None when the job is unknown
+    """
+    runner = job_runner if runner is None else runner
+    deadline = None if timeout is None else time.perf_counter() + timeout
+    generation = None
+    while True:
+        status = runner.status(job_id)
+        if status is None:
+            return None
+        if status.event is not None and status.event.generation != generation and callback is not None:
+            generation = status.event.generation
+            callback(status.event)
+        if status.state in FINISHED or (deadline is not None and time.perf_counter() >= deadline):
+            return status
+        time.sleep(interval)
+
+
+def job_columns(job_id, runner=None):
+    """
+    The columns method of a job, to chart its whole history while following it,
+    see ga.progress.StreamlitProgress.
+    Input:
+    1- Job id
+    2- JobRunner, the shared job_runner by default
+    Output:
+    Function returning the (generations, fitness) recorded so far, None when
+    the job is unknown
+    """
+    job = (job_runner if runner is None else runner).job(job_id)
+    return None if job is None else job.columns
+
+
+#runner shared by every page and session of the app
+job_runner = JobRunner()
@@ -0,0 +1,212 @@
+import time
+from collections import deque
+
+import numpy as np
+
+from ga.rng import get_rng
+from ga.spatial import DistanceOracle, knn
+
+#local search
+#2-opt and Or-opt moves are evaluated in O(1) from the distance matrix (or a
+#ga.spatial.DistanceOracle) and only against the k nearest neighbours of each
+#city, so a pass is near-linear
+
+def neighbour_lists(dist, k=8):
+    """
+    The k nearest cities of every city, closest first. Distance oracles use
+    the spatial index instead of scanning all pairs.
+    Input:
+    1- Distance matrix or ga.spatial.DistanceOracle
+    2- Number of neighbours
+    Output:
+    Array of shape (n_cities, k)
+    """
+    if isinstance(dist, DistanceOracle):
+        return knn(dist.coords, k)
+    n_cities = len(dist)
+    k = min(k, n_cities - 1)
+    if k <= 0:
+        return np.empty((n_cities, 0), dtype=np.intp)
+    masked = np.array(dist, dtype=np.float64)
+    np.fill_diagonal(masked, np.inf)
+    nearest = np.argpartition(masked, k - 1, axis=1)[:, :k]
+    order = np.argsort(np.take_along_axis(masked, nearest, axis=1), axis=1)
+    return np.take_along_axis(nearest, order, axis=1)
+
+
+def reverse_path(tour, position, i, j):
+    """
+    Reversing the cities between positions i and j (inclusive, going forward).
+    A path that wraps around the end of the array is reversed through its
+    complement, which gives the same closed tour.
+    """
+    if i > j:
+        i, j = j + 1, i - 1
+        if i > j:
+            return
+    tour[i:j + 1] = tour[i:j + 1][::-1]
+    position[tour[i:j + 1]] = np.arange(i, j + 1)
+
+
+def move_segment(tour, position, i, length, after, reverse):
+    """
+    Moving the segment of length cities starting at position i so that it
+    follows position after, optionally reversed.
+    """
+    segment = tour[i:i + length].copy()
+    if reverse:
+        segment = segment[::-1]
+    if after > i:
+        tour[i:after - length + 1] = tour[i + length:after + 1]
+        tour[after - length + 1:after + 1] = segment
+        lo, hi = i, after + 1
+    else:
+        tour[after + 1 + length:i + length] = tour[after + 1:i]
+        tour[after + 1:after + 1 + length] = segment
+        lo, hi = after + 1, i + length
+    position[tour[lo:hi]] = np.arange(lo, hi)
+
+
+def two_opt_move(tour, position, dist, neighbours, a):
+    """
+    Looking for an improving 2-opt move that adds an edge from city a to one of
+    its neighbours. Applies the first one found and returns its delta and the
+    four cities whose edges changed.
+    """
+    n_cities = len(tour)
+    i = position[a]
+    succ_a = tour[(i + 1) % n_cities]
+    pred_a = tour[i - 1]
+    d_succ = dist[a, succ_a]
+    d_pred = dist[pred_a, a]
+    for c in neighbours[a]:
+        d_ac = dist[a, c]
+        if d_ac >= d_succ and d_ac >= d_pred:
+            break
+        j = position[c]
+        if d_ac < d_succ:
+            succ_c = tour[(j + 1) % n_cities]
+            delta = d_ac + dist[succ_a, succ_c] - d_succ - dist[c, succ_c]
+            if delta < -1e-10:
+                reverse_path(tour, position, (i + 1) % n_cities, j)
+                return delta, (a, succ_a, c, succ_c)
+        if d_ac < d_pred:
+            pred_c = tour[j - 1]
+            delta = d_ac + dist[pred_a, pred_c] - d_pred - dist[pred_c, c]
+            if delta < -1e-10:
+                reverse_path(tour, position, j, (i - 1) % n_cities)
+                return delta, (a, pred_a, c, pred_c)
+    return 0.0, ()
+
+
+def or_opt_move(tour, position, dist, neighbours, a, max_length=3):
+    """
+    Looking for an improving Or-opt move of a segment of 1 to max_length cities
+    starting at city a, reinserted next to a neighbour in either orientation.
+    Applies the first one found and returns its delta and the cities whose
+    edges changed.
+    """
+    n_cities = len(tour)
+    i = position[a]
+    for length in range(1, max_length + 1):
+        if i + length >= n_cities or length + 2 > n_cities:
+            break
+        first, last = tour[i], tour[i + length - 1]
+        pred, succ = tour[i - 1], tour[i + length]
+        removed = dist[pred, first] + dist[last, succ] - dist[pred, succ]
+        segment = set(tour[i:i + length].tolist())
+
+        for end, other_end in ((first, last), (last, first)):
+            for c in neighbours[end]:
+                if dist[end, c] >= removed:
+                    break
+                if c in segment:
+                    continue
+                j = position[c]
+                # end joins c on its left (c end ... e) or on its right (e ... end c)
+                for left in (True, False):
+                    e = tour[(j + 1) % n_cities] if left else tour[j - 1]
+                    if e in segment:
+                        continue
+                    added = dist[c, end] + dist[other_end, e] - dist[c, e]
+                    delta = added - removed
+                    if delta < -1e-10:
+                        after = j if left else (j - 1) % n_cities
+                        reverse = (end == last) if left else (end == first)
+                        move_segment(tour, position, i, length, after, reverse)
+                        return delta, (pred, succ, first, last, c, e)
+    return 0.0, ()
+
+
+def improve_tour(tour, dist, neighbours, max_passes=None, time_budget=None, or_opt=True):
+    """
+    Improving a tour with 2-opt and Or-opt moves until no move helps, the pass
+    limit is reached or the time budget runs out. Uses don't-look bits so only
+    cities next to a recent change are revisited.
+    Input:
+    1- Tour as an array of city indices, improved in place
+    2- Distance matrix
+    3- Neighbour lists from neighbour_lists
+    4- Maximum number of passes over the active cities
+    5- Time budget in seconds
+    6- Whether to try Or-opt moves as well as 2-opt
+    Output:
+    Change in tour length, zero or negative
+    """
+    n_cities = len(tour)
+    if n_cities < 5:
+        return 0.0
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    position = np.empty(n_cities, dtype=np.intp)
+    position[tour] = np.arange(n_cities)
+    neighbours = neighbours.tolist()
+
+    total = 0.0
+    active = deque(range(n_cities))
+    queued = np.ones(n_cities, dtype=bool)
+    passes = 0
+    while active and (max_passes is None or passes < max_passes):
+        for _ in range(len(active)):
+            a = active.popleft()
+            queued[a] = False
+            delta, touched = two_opt_move(tour, position, dist, neighbours, a)
+            if not touched and or_opt:
+                delta, touched = or_opt_move(tour, position, dist, neighbours, a)
+            total += delta
+            for city in touched:
+                if not queued[city]:
+                    queued[city] = True
+                    active.append(city)
+            if deadline is not None and time.perf_counter() > deadline:
+                return total
+        passes += 1
+    return total
+
+
+def improve_offspring(offspring, dist, neighbours, memetic_per=0.1, max_passes=None, time_budget=None, rng=None,
+                      lengths=None):
+    """
+    Memetic step: improving a random share of the offspring in place with local search.
+    Input:
+    1- Offspring array of shape (n_offspring, n_cities)
+    2- Distance matrix
+    3- Neighbour lists from neighbour_lists
+    4- Share of offspring to improve
+    5- Maximum number of passes per tour
+    6- Time budget in seconds for the whole step
+    7- Generator or seed, see ga.rng
+    8- Tour lengths of the offspring, updated in place with each improvement
+    Output:
+    Indices of the improved offspring
+    """
+    n_improve = max(1, int(memetic_per * len(offspring)))
+    chosen = get_rng(rng).choice(len(offspring), min(n_improve, len(offspring)), replace=False)
+    deadline = None if time_budget is None else time.perf_counter() + time_budget
+    for k, i in enumerate(chosen):
+        remaining = None if deadline is None else deadline - time.perf_counter()
+        if remaining is not None and remaining <= 0:
+            return chosen[:k]
+        delta = improve_tour(offspring[i], dist, neighbours, max_passes, remaining)
+        if lengths is not None:
+            lengths[i] += delta
+    return chosen
@@ -0,0 +1,170 @@
+import numpy as np
+
+from ga.rng import get_rng
+
+#mutation
+#every operator mutates the given rows of a population in place with one
+#move each, all rows at once. Given a distance matrix it also returns the
+#change in tour length of every mutated row, computed in O(1) per row from
+#the few edges the move replaces, so mutated tours never need a full
+#re-evaluation. Distances are assumed symmetric.
+
+def _gather(tours, columns):
+    return np.take_along_axis(tours, columns % tours.shape[1], axis=1)
+
+
+def _edges_delta(before, after, edges, dist):
+    """
+    Length change over the edges starting at the given positions (each edge
+    counted once), between two versions of the same tours.
+    """
+    edges = np.sort(edges % before.shape[1], axis=1)
+    once = np.ones(edges.shape, dtype=bool)
+    once[:, 1:] = edges[:, 1:] != edges[:, :-1]
+    old = dist[_gather(before, edges), _gather(before, edges + 1)]
+    new = dist[_gather(after, edges), _gather(after, edges + 1)]
+    return ((new - old) * once).sum(axis=1)
+
+
+def _reverse(tours, lo, hi):
+    # positions lo..hi of every row reversed, lo <= hi + 1
+    cols = np.arange(tours.shape[1])[None, :]
+    lo, hi = lo[:, None], hi[:, None]
+    return _gather(tours, np.where((cols >= lo) & (cols <= hi), lo + hi - cols, cols))
+
+
+def _reversal_delta(tours, lo, hi, dist):
+    n_cities = tours.shape[1]
+    rows = np.arange(len(tours))
+    before, first, last, after = (tours[rows, (lo - 1) % n_cities], tours[rows, lo % n_cities],
+                                  tours[rows, hi % n_cities], tours[rows, (hi + 1) % n_cities])
+    delta = dist[before, last] + dist[first, after] - dist[before, first] - dist[last, after]
+    # reversing all the tour, or all but one city, gives back the same cycle
+    return np.where(hi - lo + 1 >= n_cities - 1, 0.0, delta)
+
+
+def swap_mutation(offspring, rows, rng=None, dist=None):
+    """
+    Swapping two random cities of every given row.
+    Input:
+    1- Offspring array of shape (n_offspring, n_cities), changed in place
+    2- Indices of the rows to mutate
+    3- Generator or seed, see ga.rng
+    4- Distance matrix, to get the length changes back
+    Output:
+    Length change of every mutated row, None without a distance matrix
+    """
+    rng = get_rng(rng)
+    swaps = rng.integers(0, offspring.shape[1], (len(rows), 2))
+    if dist is None:
+        offspring[rows[:, None], swaps] = offspring[rows[:, None], swaps[:, ::-1]]
+        return None
+    tours = offspring[rows]
+    mutated = tours.copy()
+    mutated[np.arange(len(rows))[:, None], swaps] = tours[np.arange(len(rows))[:, None], swaps[:, ::-1]]
+    offspring[rows] = mutated
+    i, j = swaps[:, 0], swaps[:, 1]
+    return _edges_delta(tours, mutated, np.stack([i - 1, i, j - 1, j], axis=1), dist)
+
+
+def reversal_mutation(offspring, rows, rng=None, dist=None):
+    """
+    2-opt mutation: reversing a random path of every given row.
+    Same inputs and output as swap_mutation.
+    """
+    rng = get_rng(rng)
+    cuts = np.sort(rng.integers(0, offspring.shape[1], (len(rows), 2)), axis=1)
+    lo, hi = cuts[:, 0], cuts[:, 1]
+    tours = offspring[rows]
+    offspring[rows] = _reverse(tours, lo, hi)
+    return None if dist is None else _reversal_delta(tours, lo, hi, dist)
+
+
+def insertion_mutation(offspring, rows, rng=None, dist=None):
+    """
+    Moving a random city of every given row to a random new position.
+    Same inputs and output as swap_mutation.
+    """
+    rng = get_rng(rng)
+    n_cities = offspring.shape[1]
+    moves = rng.integers(0, n_cities, (len(rows), 2))
+    i, j = moves[:, 0:1], moves[:, 1:2]
+    cols = np.arange(n_cities)[None, :]
+    source = np.where((cols >= i) & (cols < j), cols + 1, np.where((cols > j) & (cols <= i), cols - 1, cols))
+    source = np.where(cols == j, i, source)
+    tours = offspring[rows]
+    mutated = _gather(tours, source)
+    offspring[rows] = mutated
+    if dist is None:
+        return None
+
+    i, j = i[:, 0], j[:, 0]
+    at = np.arange(len(rows))
+    city = tours[at, i]
+    removed = (dist[tours[at, (i - 1) % n_cities], tours[at, (i + 1) % n_cities]]
+               - dist[tours[at, (i - 1) % n_cities], city] - dist[city, tours[at, (i + 1) % n_cities]])
+    before, after = mutated[at, (j - 1) % n_cities], mutated[at, (j + 1) % n_cities]
+    inserted = dist[before, city] + dist[city, after] - dist[before, after]
+    return np.where(i == j, 0.0, removed + inserted)
+
+
+def neighbour_mutation(offspring, rows, neighbours, rng=None, dist=None):
+    """
+    Mutating the given rows in place with one move towards a candidate each:
+    a random city and one of its nearest neighbours are made adjacent by
+    reversing the path between them, as a random 2-opt move would.
+    Input:
+    1- Offspring array of shape (n_offspring, n_cities)
+    2- Indices of the rows to mutate
+    3- Candidate neighbour lists, shape (n_cities, k)
+    4- Generator or seed, see ga.rng
+    5- Distance matrix, to get the length changes back
+    Output:
+    Length change of every mutated row, None without a distance matrix
+    """
+    rng = get_rng(rng)
+    n_cities = offspring.shape[1]
+    if len(rows) == 0 or neighbours.shape[1] == 0:
+        return None if dist is None else np.zeros(len(rows))
+    tours = offspring[rows]
+    i = rng.integers(0, n_cities, len(rows))
+    cities = tours[np.arange(len(rows)), i]
+    targets = neighbours[cities, rng.integers(0, neighbours.shape[1], len(rows))]
+    j = np.argmax(tours == targets[:, None], axis=1)
+
+    # the target ends up right after the city, or right before it
+    lo = np.where(j > i, i + 1, j)
+    hi = np.where(j > i, j, i - 1)
+    offspring[rows] = _reverse(tours, lo, hi)
+    return None if dist is None else _reversal_delta(tours, lo, hi, dist)
+
+
+MUTATIONS = {
+    "swap": swap_mutation,
+    "two_opt": reversal_mutation,
+    "insertion": insertion_mutation,
+}
+
+
+def mutate(offspring, rows, operator="swap", rng=None, dist=None, neighbours=None):
+    """
+    Mutating the given rows with the named operator, or with neighbour moves
+    when candidate neighbour lists are given.
+    Input:
+    1- Offspring array of shape (n_offspring, n_cities), changed in place
+    2- Indices of the rows to mutate
+    3- Operator name from MUTATIONS
+    4- Generator or seed, see ga.rng
+    5- Distance matrix, to get the length changes back
+    6- Candidate neighbour lists
+    Output:
+    Length change of every mutated row, None without a distance matrix
+    """
+    rows = np.asarray(rows, dtype=np.intp)
+    if neighbours is not None:
+        return neighbour_mutation(offspring, rows, neighbours, rng, dist)
+    try:
+        mutation = MUTATIONS[operator]
+    except KeyError:
+        raise ValueError(f"unknown mutation {operator!r}, expected one of {sorted(MUTATIONS)}") from None
+    return mutation(offspring, rows, rng, dist)
@@ -0,0 +1,322 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from ga.checkpoint import MemoryCheckpointer
+from ga.distance import tour_lengths
+from ga.population import random_population
+from ga.rng import get_rng, spawn
+from ga.strings import GENES, MUT_RATE, POP_SIZE, GenerationBuffers, StringResult, decode, encode, \
+    fitness_cal, initialize_pop, mating_pool_size, step
+from ga.termination import AnyOf, MaxGenerations, Stagnation, TargetFitness
+from ga.tsp import GAResult, run_ga
+
+#shared memory
+#arrays are copied into shared memory once, workers attach to them by name
+
+def share_array(array):
+    """
+    Copying an array into a new shared memory block.
+    Input:
+    1- Array
+    Output:
+    1- SharedMemory block, the caller closes and unlinks it
+    2- Spec (name, shape, dtype) workers use to attach
+    """
+    array = np.ascontiguousarray(array)
+    shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+    return shm, (shm.name, array.shape, array.dtype.str)
+
+
+def attach_array(spec):
+    """
+    Attaching to a shared array from its spec. The block must stay referenced
+    as long as the array is used.
+    """
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return shm, np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf)
+
+
+def release(blocks):
+    for shm in blocks:
+        shm.close()
+        shm.unlink()
+
+
+_worker = {}
+
+
+def _attach_worker(specs):
+    for key, spec in specs.items():
+        _worker[key] = attach_array(spec)
+
+
+#parallel fitness evaluation
+
+def _evaluate_rows(start, stop):
+    _, dist = _worker["dist"]
+    _, population = _worker["population"]
+    _, lengths = _worker["lengths"]
+    lengths[start:stop] = tour_lengths(population[start:stop], dist)
+
+
+class SharedEvaluator:
+    """
+    Tour length evaluator that shards the population across worker processes.
+    The distance matrix, population and results live in shared memory, so a
+    generation costs one memory copy of the population instead of pickling it.
+    Usable as run_ga(..., evaluator=SharedEvaluator(...)).
+    """
+
+    def __init__(self, dist, max_population, max_workers=None):
+        n_cities = len(dist)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        dist_shm, dist_spec = share_array(dist)
+        population_shm, population_spec = share_array(np.zeros((max_population, n_cities), dtype=np.int64))
+        lengths_shm, lengths_spec = share_array(np.zeros(max_population))
+        self._blocks = [dist_shm, population_shm, lengths_shm]
+        self._population = np.ndarray((max_population, n_cities), dtype=np.int64, buffer=population_shm.buf)
+        self._lengths = np.ndarray(max_population, dtype=np.float64, buffer=lengths_shm.buf)
+        self._pool = ProcessPoolExecutor(
+            self.max_workers, initializer=_attach_worker,
+            initargs=({"dist": dist_spec, "population": population_spec, "lengths": lengths_spec},))
+
+    def tour_lengths(self, population):
+        n_population = len(population)
+        if n_population > len(self._population):
+            raise ValueError(f"population of {n_population} exceeds the shared buffer of {len(self._population)}")
+        self._population[:n_population] = population
+        bounds = np.linspace(0, n_population, self.max_workers + 1).astype(int)
+        futures = [self._pool.submit(_evaluate_rows, start, stop)
+                   for start, stop in zip(bounds[:-1], bounds[1:]) if stop > start]
+        for future in futures:
+            future.result()
+        return self._lengths[:n_population].copy()
+
+    def close(self):
+        self._pool.shutdown()
+        release(self._blocks)
+        self._blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+#island model
+
+def _evolve_island(n_population, n_generations, population, rng, state, ga_kwargs):
+    # every epoch continues the island's run from its state, so the generation
+    # count, policy counters, re-injection pool and RNG stream carry across
+    # migrations; population and rng only seed the first epoch. The epoch limit
+    # is checked after the run's own policy, whose reason wins when both fire
+    _, dist = _worker["dist"]
+    memory = MemoryCheckpointer()
+    kwargs = dict(ga_kwargs, termination=AnyOf(ga_kwargs.get("termination"), MaxGenerations(n_generations)))
+    result = run_ga(dist, n_population, None, population=population, seed=rng, checkpoint=memory,
+                    resume_from=state, **kwargs)
+    return result, memory.state or state
+
+
+def migrate(populations, dist, n_migrants, topology="ring", rng=None):
+    """
+    Copying the n_migrants best tours of every island over the worst tours of
+    its destination: the next island for a ring, a random other island otherwise.
+    Input:
+    1- List of island populations, modified in place
+    2- Distance matrix
+    3- Number of migrants per island
+    4- Topology, "ring" or "random"
+    5- Generator or seed for the random topology, see ga.rng
+    """
+    if len(populations) < 2 or n_migrants <= 0:
+        return
+    migrate_by(populations, [tour_lengths(population, dist) for population in populations], n_migrants,
+               topology, rng)
+
+
+def migrate_by(populations, scores, n_migrants, topology="ring", rng=None):
+    """
+    migrate with the score of every member given, lower is better, for
+    populations other than tours. The scores of replaced members become
+    their migrants' scores.
+    Input:
+    1- List of island populations, modified in place
+    2- List of score arrays, one per island, modified in place
+    3- Number of migrants per island
+    4- Topology, "ring" or "random"
+    5- Generator or seed for the random topology, see ga.rng
+    """
+    n_islands = len(populations)
+    if n_islands < 2 or n_migrants <= 0:
+        return
+    chosen = [np.argsort(score)[:n_migrants] for score in scores]
+    migrants = [population[best].copy() for population, best in zip(populations, chosen)]
+    migrant_scores = [score[best].copy() for score, best in zip(scores, chosen)]
+
+    if topology == "ring":
+        destinations = [(k + 1) % n_islands for k in range(n_islands)]
+    elif topology == "random":
+        destinations = (np.arange(n_islands) + get_rng(rng).integers(1, n_islands, n_islands)) % n_islands
+    else:
+        raise ValueError(f"unknown topology {topology!r}, expected 'ring' or 'random'")
+
+    # slots that already took migrants rank as the best, so with a random
+    # topology a second source never overwrites the first one's migrants
+    ranks = [np.array(score, dtype=np.float64) for score in scores]
+    for source, destination in enumerate(destinations):
+        worst = np.argsort(ranks[destination])[::-1][:n_migrants]
+        populations[destination][worst] = migrants[source]
+        scores[destination][worst] = migrant_scores[source]
+        ranks[destination][worst] = -np.inf
+
+
+def run_islands(dist, n_islands=4, n_population=250, n_generations=200, migration_interval=20,
+                n_migrants=2, topology="ring", max_workers=None, seed=None, **ga_kwargs):
+    """
+    Island model GA: n_islands sub-populations evolve in separate processes and
+    exchange their best tours every migration_interval generations. Each island
+    is one run_ga run continued across migrations. The run stops at
+    n_generations, or once the termination policy of an island fires.
+    Input:
+    1- Distance matrix
+    2- Number of islands
+    3- Population per island
+    4- Number of generations, None for no limit
+    5- Generations between migrations
+    6- Migrants sent by every island
+    7- Migration topology, "ring" or "random"
+    8- Worker processes, one per island by default
+    9- RNG seed or Generator; every island evolves on its own child stream of it
+    10- Any other run_ga parameter but checkpoints, applied on every island;
+        a termination policy is checked per island
+    Output:
+    GAResult with all final island populations and their lengths stacked,
+    the number of generations run, the name of the condition that stopped
+    the run and the best tour of all islands, its length and generation
+    """
+    if n_generations is None and ga_kwargs.get("termination") is None:
+        raise ValueError("run_islands needs n_generations or a termination policy to stop")
+    n_cities = len(dist)
+    rng = get_rng(seed)
+    island_rngs = spawn(rng, n_islands)
+    populations = [random_population(n_cities, n_population, rng=island_rng) for island_rng in island_rngs]
+    states = [None] * n_islands
+    dist_shm, dist_spec = share_array(dist)
+    try:
+        with ProcessPoolExecutor(max_workers or min(n_islands, os.cpu_count() or 1),
+                                 initializer=_attach_worker, initargs=({"dist": dist_spec},)) as pool:
+            done, stop_reason = 0, None
+            while stop_reason is None:
+                epoch_end = done + migration_interval if n_generations is None \
+                    else min(done + migration_interval, n_generations)
+                futures = [pool.submit(_evolve_island, n_population, epoch_end, population, island_rng, state,
+                                       ga_kwargs)
+                           for population, island_rng, state in zip(populations, island_rngs, states)]
+                results, states = map(list, zip(*[future.result() for future in futures]))
+                populations, island_rngs = [None] * n_islands, [None] * n_islands
+
+                fired = [(result.generations, result.stop_reason) for result in results
+                         if result.stop_reason != MaxGenerations.name]
+                if fired:
+                    # the island that stopped first sets the generation
+                    done, stop_reason = min(fired)
+                    break
+                done = epoch_end
+                if n_generations is not None and done >= n_generations:
+                    stop_reason = MaxGenerations.name
+                else:
+                    # migrants replace tours of the populations the islands continue from
+                    migrate_by([arrays["current"] for arrays, _ in states],
+                               [arrays["current_lengths"] for arrays, _ in states], n_migrants, topology, rng)
+    finally:
+        release([dist_shm])
+    best = min(results, key=lambda result: result.best_length)
+    return GAResult(np.concatenate([result.population for result in results]),
+                    np.concatenate([result.lengths for result in results]), done, stop_reason,
+                    best.best_tour, best.best_length, best.best_generation)
+
+
+#string islands
+#the string GA is too cheap per chromosome for sharded evaluation to pay for
+#its inter-process traffic, so it only gets the island model. Islands stop
+#early once they find the target.
+
+def _evolve_string_island(population, fitness, target_codes, n_generations, MUT_RATE, GENES, rng):
+    buffers = GenerationBuffers(*population.shape)
+    buffers.population[...], buffers.fitness[...] = population, fitness
+    pool_size = mating_pool_size(len(population))
+    for generation in range(1, n_generations + 1):
+        best = step(buffers, target_codes, pool_size, MUT_RATE, GENES, rng)
+        if buffers.fitness[best] == 0:
+            break
+    return buffers.population, buffers.fitness, generation, rng
+
+
+def run_string_islands(TARGET, n_islands=4, POP_SIZE=POP_SIZE, MUT_RATE=MUT_RATE, GENES=GENES,
+                       max_generations=None, stagnation=1000, migration_interval=50, n_migrants=2,
+                       topology="ring", max_workers=None, seed=None):
+    """
+    Island model string GA: n_islands populations evolve in separate processes
+    and exchange their fittest chromosomes every migration_interval generations.
+    The run stops when an island finds the target, at max_generations, or after
+    stagnation generations without improvement, checked between migrations.
+    Input:
+    1- Target string
+    2- Number of islands
+    3- Number of chromosomes per island
+    4- Mutation rate
+    5- Genes the strings are built from
+    6- Maximum number of generations, None for no limit
+    7- Generations without improvement before the run is given up
+    8- Generations between migrations
+    9- Migrants sent by every island
+    10- Migration topology, "ring" or "random"
+    11- Worker processes, one per island by default
+    12- RNG seed or Generator; every island evolves on its own child stream of it
+    Output:
+    StringResult with the fittest chromosome of all islands
+    """
+    if max_generations is None and stagnation is None:
+        raise ValueError("run_string_islands needs max_generations or stagnation to stop")
+    rng = get_rng(seed)
+    island_rngs = spawn(rng, n_islands)
+    target_codes = encode(TARGET, GENES)
+    populations = [initialize_pop(TARGET, POP_SIZE, GENES, island_rng) for island_rng in island_rngs]
+    fitnesses = [fitness_cal(target_codes, population) for population in populations]
+    best_fitness, best_generation = min(fitness.min() for fitness in fitnesses), 0
+
+    with ProcessPoolExecutor(max_workers or min(n_islands, os.cpu_count() or 1)) as pool:
+        done, stop_reason = 0, None
+        while stop_reason is None:
+            epoch = migration_interval if max_generations is None else min(migration_interval, max_generations - done)
+            futures = [pool.submit(_evolve_string_island, population, fitness, target_codes, epoch, MUT_RATE,
+                                   GENES, island_rng)
+                       for population, fitness, island_rng in zip(populations, fitnesses, island_rngs)]
+            populations, fitnesses, generations, island_rngs = map(list, zip(*[future.result() for future in futures]))
+
+            fittest = min(fitness.min() for fitness in fitnesses)
+            if fittest == 0:
+                # the island that got there first sets the generation
+                done += min(generation for generation, fitness in zip(generations, fitnesses) if fitness.min() == 0)
+                stop_reason = TargetFitness.name
+                break
+            done += epoch
+            if fittest < best_fitness:
+                best_fitness, best_generation = fittest, done
+            if max_generations is not None and done >= max_generations:
+                stop_reason = MaxGenerations.name
+            elif stagnation is not None and done - best_generation >= stagnation:
+                stop_reason = Stagnation.name
+            else:
+                migrate_by(populations, fitnesses, n_migrants, topology, rng)
+
+    island = min(range(n_islands), key=lambda k: fitnesses[k].min())
+    best = np.argmin(fitnesses[island])
+    return StringResult(decode(populations[island][best], GENES), done, int(fitnesses[island][best]), stop_reason)
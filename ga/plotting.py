@@ -0,0 +1,161 @@
+import pickle
+import threading
+from collections import OrderedDict
+
+#plotting
+#matplotlib and seaborn are imported inside the functions, so importing the
+#ga package for headless runs does not pay for them. Figures are built with
+#matplotlib.figure.Figure instead of pyplot, so nothing accumulates in pyplot's
+#global figure list and sessions can draw from separate threads.
+
+#base maps are cached per city set; callers get a copy to draw on
+_base_maps = OrderedDict()
+_base_maps_lock = threading.Lock()
+MAX_BASE_MAPS = 8
+
+
+def city_edges(coords, max_edges, seed=0):
+    """
+    Segments between pairs of cities, all of them when there are at most
+    max_edges pairs and an evenly drawn sample otherwise.
+    Input:
+    1- City coordinates, shape (n_cities, 2)
+    2- Maximum number of segments
+    Output:
+    Array of shape (n_edges, 2, 2)
+    """
+    import numpy as np
+
+    n_cities = len(coords)
+    n_pairs = n_cities * (n_cities - 1) // 2
+    if max_edges <= 0 or n_pairs == 0:
+        return np.empty((0, 2, 2))
+    if n_pairs <= max_edges:
+        i, j = np.triu_indices(n_cities, k=1)
+    else:
+        rng = np.random.default_rng(seed)
+        i = rng.integers(0, n_cities, max_edges)
+        j = (i + rng.integers(1, n_cities, max_edges)) % n_cities
+    return np.stack([coords[i], coords[j]], axis=1)
+
+
+def _build_base_map(city_coords, city_icons, max_edges, label_limit):
+    import numpy as np
+    import seaborn as sns
+    from matplotlib.collections import LineCollection
+    from matplotlib.figure import Figure
+
+    names = list(city_coords)
+    coords = np.array(list(city_coords.values()), dtype=float).reshape(-1, 2)
+    n_cities = len(coords)
+
+    fig = Figure(figsize=(16, 12))
+    ax = fig.add_subplot()
+    ax.grid(False)  # Grid
+
+    # Connect cities with opaque lines, one artist for every segment
+    ax.add_collection(LineCollection(city_edges(coords, max_edges), colors='gray', linewidths=1, alpha=0.1,
+                                     zorder=1))
+
+    # Pastel Pallete, markers shrink as the city count grows
+    colors = sns.color_palette("pastel", min(n_cities, 10))
+    marker_size = 1200 if n_cities <= 20 else max(4, 24000 / n_cities)
+    ax.scatter(coords[:, 0], coords[:, 1], c=[colors[i % len(colors)] for i in range(n_cities)],
+               s=marker_size, zorder=2)
+
+    if n_cities <= label_limit:
+        for city, (city_x, city_y) in zip(names, coords):
+            icon = city_icons.get(city, "")
+            ax.annotate(icon, (city_x, city_y), fontsize=40, ha='center', va='center', zorder=3)
+            ax.annotate(city, (city_x, city_y), fontsize=12, ha='center', va='bottom', xytext=(0, -30),
+                        textcoords='offset points')
+    ax.autoscale_view()
+    return fig
+
+
+def base_map(city_coords, city_icons=None, max_edges=20000, label_limit=50):
+    """
+    Cities as one scatter plus one LineCollection of background edges, built
+    once per city set and returned as a fresh copy on every call.
+    Input:
+    1- Dict of city name to (x, y)
+    2- Dict of city name to icon
+    3- Maximum number of background edges, sampled above it; 0 skips them
+    4- Cities above which icons and names are not drawn
+    Output:
+    Matplotlib figure
+    """
+    city_icons = city_icons or {}
+    key = (tuple((city, tuple(xy)) for city, xy in city_coords.items()),
+           tuple(sorted(city_icons.items())), max_edges, label_limit)
+    with _base_maps_lock:
+        data = _base_maps.get(key)
+        if data is not None:
+            _base_maps.move_to_end(key)
+    if data is None:
+        data = pickle.dumps(_build_base_map(city_coords, city_icons, max_edges, label_limit))
+        with _base_maps_lock:
+            _base_maps[key] = data
+            while len(_base_maps) > MAX_BASE_MAPS:
+                _base_maps.popitem(last=False)
+    return pickle.loads(data)
+
+
+def plot_cities(city_coords, city_icons, max_edges=20000):
+    """
+    Plotting the cities with their icons over faint lines between them.
+    Input:
+    1- Dict of city name to (x, y)
+    2- Dict of city name to icon
+    3- Maximum number of background edges
+    Output:
+    Matplotlib figure
+    """
+    return base_map(city_coords, city_icons, max_edges)
+
+
+def plot_route(shortest_path, city_coords, minimum_distance, n_generations, n_population,
+               crossover_per, mutation_per, city_icons=None, max_edges=20000, label_limit=50):
+    """
+    Plotting the best route found by the GA on top of the cached base map.
+    Input:
+    1- Route as a list of city names
+    2- Dict of city name to (x, y)
+    3- Length of the route
+    4- GA parameters shown in the title
+    5- Dict of city name to icon
+    6- Maximum number of background edges
+    7- Cities above which route positions are not annotated
+    Output:
+    Matplotlib figure
+    """
+    fig = base_map(city_coords, city_icons, max_edges, label_limit)
+    ax = fig.axes[0]
+
+    x_shortest = []
+    y_shortest = []
+    for city in shortest_path:
+        x_value, y_value = city_coords[city]
+        x_shortest.append(x_value)
+        y_shortest.append(y_value)
+
+    x_shortest.append(x_shortest[0])
+    y_shortest.append(y_shortest[0])
+
+    ax.plot(x_shortest, y_shortest, '--go', label='Best Route', linewidth=2.5, zorder=4)
+    ax.legend()
+
+    ax.set_title(label="TSP Best Route Using GA",
+                 fontsize=25,
+                 color="k")
+
+    str_params = '\n'+str(n_generations)+' Generations\n'+str(n_population)+' Population Size\n'+str(crossover_per)+' Crossover\n'+str(mutation_per)+' Mutation'
+    fig.suptitle("Total Distance Travelled: "+
+                 str(round(minimum_distance, 3)) +
+                 str_params, fontsize=18, y = 1.047)
+
+    if len(shortest_path) <= label_limit:
+        for i, txt in enumerate(shortest_path):
+            ax.annotate(str(i+1)+ "- " + txt, (x_shortest[i], y_shortest[i]), fontsize= 20)
+
+    return fig
@@ -0,0 +1,97 @@
+import numpy as np
+
+from ga.encoding import index_dtype
+from ga.rng import get_rng
+
+#population
+
+def max_unique_tours(n_cities, limit):
+    """
+    Number of distinct orderings of the cities, capped at limit so the
+    factorial is never computed past what the caller needs.
+    """
+    count = 1
+    for k in range(2, n_cities + 1):
+        count *= k
+        if count >= limit:
+            return limit
+    return count
+
+
+def random_permutations(n_population, n_cities, max_rounds=10, rng=None):
+    """
+    Generating random permutations of the city indices directly, without
+    materializing all possible permutations. Rows are unique whenever there
+    are at least n_population distinct tours.
+    Input:
+    1- Number of population
+    2- Number of cities
+    3- Rounds of redrawing duplicates
+    4- Generator or seed, see ga.rng
+    Output:
+    Array of shape (n_population, n_cities), one tour per row
+    """
+    rng = get_rng(rng)
+    perms = np.argsort(rng.random((n_population, n_cities)), axis=1).astype(index_dtype(n_cities))
+    if max_unique_tours(n_cities, n_population) < n_population:
+        return perms
+
+    for _ in range(max_rounds):
+        _, first = np.unique(perms, axis=0, return_index=True)
+        if len(first) == n_population:
+            break
+        duplicates = np.setdiff1d(np.arange(n_population), first)
+        perms[duplicates] = np.argsort(rng.random((len(duplicates), n_cities)), axis=1)
+    return perms
+
+
+def nearest_neighbour_tour(coords, start=0):
+    """
+    Greedy tour that always moves on to the closest unvisited city.
+    Input:
+    1- City coordinates, shape (n_cities, 2)
+    2- Index of the starting city
+    Output:
+    Tour as an array of city indices
+    """
+    coords = np.asarray(coords, dtype=float)
+    n_cities = len(coords)
+    visited = np.zeros(n_cities, dtype=bool)
+    tour = np.empty(n_cities, dtype=index_dtype(n_cities))
+
+    current = start
+    for k in range(n_cities):
+        tour[k] = current
+        visited[current] = True
+        if k == n_cities - 1:
+            break
+        dist = ((coords - coords[current]) ** 2).sum(axis=1)
+        dist[visited] = np.inf
+        current = int(np.argmin(dist))
+    return tour
+
+
+def random_population(n_cities, n_population=250, coords=None, n_greedy=0, rng=None):
+    """
+    Initial population of tours built in O(n_population * n_cities) memory.
+    Input:
+    1- Number of cities
+    2- Number of population
+    3- City coordinates, needed only for greedy starts
+    4- Number of nearest neighbour tours to seed the population with
+    5- Generator or seed, see ga.rng
+    Output:
+    Array of shape (n_population, n_cities), one tour per row
+    """
+    rng = get_rng(rng)
+    population = random_permutations(n_population, n_cities, rng=rng)
+
+    n_greedy = min(n_greedy, n_population, n_cities)
+    if n_greedy > 0:
+        if coords is None:
+            raise ValueError("coords are required for nearest neighbour starts")
+        starts = rng.choice(n_cities, n_greedy, replace=False)
+        for i, start in enumerate(starts):
+            population[i] = nearest_neighbour_tour(coords, start)
+
+    return population
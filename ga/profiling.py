@@ -0,0 +1,169 @@
+import contextlib
+import csv
+import json
+import time
+import tracemalloc
+
+#profiling
+#the engines time each operator of a generation through profiler.section(name)
+#when run with a Profiler. Without one they use a shared do-nothing context, so
+#profiling off costs one attribute lookup per operator call. Records are kept
+#per generation and exported as JSON or CSV.
+
+_OFF = contextlib.nullcontext()
+
+
+def _off(name):
+    return _OFF
+
+
+def sections(profiler):
+    """
+    Function opening a timed section of the profiler, or a no-op one without a profiler.
+    """
+    return _off if profiler is None else profiler.section
+
+
+class _Section:
+    __slots__ = ("profiler", "name", "start", "traced")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        if self.profiler.allocations:
+            tracemalloc.reset_peak()
+            self.traced = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        seconds = time.perf_counter() - self.start
+        stats = self.profiler._operators.get(self.name)
+        if stats is None:
+            stats = self.profiler._operators[self.name] = {"seconds": 0.0, "calls": 0, "peak_bytes": 0}
+        stats["seconds"] += seconds
+        stats["calls"] += 1
+        if self.profiler.allocations:
+            stats["peak_bytes"] = max(stats["peak_bytes"], tracemalloc.get_traced_memory()[1] - self.traced)
+
+
+class Profiler:
+    """
+    Wall time and calls per operator per generation, evaluations per second
+    and, with allocations on, the peak bytes allocated inside each operator
+    (through tracemalloc, which slows the run down). Sections must not nest.
+    Input:
+    1- Whether to track allocations
+    """
+
+    def __init__(self, allocations=False):
+        self.allocations = allocations
+        self.records = []
+        self._operators = {}
+        self._evaluations = 0
+        self._start = time.perf_counter()
+
+    def start(self):
+        """
+        Starting the clock of the first generation, and tracemalloc when tracking allocations.
+        """
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._operators, self._evaluations = {}, 0
+        self._start = time.perf_counter()
+
+    def stop(self):
+        if self.allocations and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        # a run that ended with an exception, such as a cancelled job, never stopped tracing
+        self.stop()
+
+    def section(self, name):
+        return _Section(self, name)
+
+    def evaluated(self, n_evaluations):
+        self._evaluations += n_evaluations
+
+    def end_generation(self, generation):
+        """
+        Closing the record of a generation, started when the previous one ended.
+        """
+        now = time.perf_counter()
+        seconds = now - self._start
+        self.records.append({"generation": generation, "seconds": seconds, "evaluations": self._evaluations,
+                             "evaluations_per_second": self._evaluations / seconds if seconds > 0 else 0.0,
+                             "operators": self._operators})
+        self._operators, self._evaluations = {}, 0
+        self._start = now
+
+    def summary(self):
+        """
+        Totals per operator over all generations, slowest first, with the share
+        of the total generation time each one took.
+        Output:
+        Dict of operator name to seconds, calls, peak_bytes and share
+        """
+        total = sum(record["seconds"] for record in self.records) or 1.0
+        operators = {}
+        for record in self.records:
+            for name, stats in record["operators"].items():
+                summed = operators.setdefault(name, {"seconds": 0.0, "calls": 0, "peak_bytes": 0})
+                summed["seconds"] += stats["seconds"]
+                summed["calls"] += stats["calls"]
+                summed["peak_bytes"] = max(summed["peak_bytes"], stats["peak_bytes"])
+        for stats in operators.values():
+            stats["share"] = stats["seconds"] / total
+        return dict(sorted(operators.items(), key=lambda item: -item[1]["seconds"]))
+
+    def evaluations_per_second(self):
+        seconds = sum(record["seconds"] for record in self.records)
+        evaluations = sum(record["evaluations"] for record in self.records)
+        return evaluations / seconds if seconds > 0 else 0.0
+
+    def rows(self):
+        """
+        One (generation, operator, seconds, calls, peak_bytes) row per operator
+        per generation, plus a "generation" row with the whole generation.
+        """
+        for record in self.records:
+            yield record["generation"], "generation", record["seconds"], record["evaluations"], 0
+            for name, stats in record["operators"].items():
+                yield record["generation"], name, stats["seconds"], stats["calls"], stats["peak_bytes"]
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump({"summary": self.summary(), "evaluations_per_second": self.evaluations_per_second(),
+                       "generations": self.records}, f, indent=2)
+
+    def to_csv(self, path):
+        # generation rows carry the number of evaluations in the calls column
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["generation", "operator", "seconds", "calls", "peak_bytes"])
+            writer.writerows(self.rows())
+
+
+def streamlit_panel(profiler, title="Profile"):
+    """
+    Expander on a Streamlit page with the time per operator of a profiled run.
+    """
+    import streamlit as st
+
+    with st.expander(title):
+        if not profiler.records:
+            st.write("Nothing was profiled, the result came from the cache.")
+            return
+        summary = profiler.summary()
+        st.write(f"{len(profiler.records)} generations, "
+                 f"{profiler.evaluations_per_second():,.0f} evaluations per second")
+        st.table({"operator": list(summary),
+                  "seconds": [stats["seconds"] for stats in summary.values()],
+                  "calls": [stats["calls"] for stats in summary.values()],
+                  "share": [f"{stats['share']:.1%}" for stats in summary.values()]})
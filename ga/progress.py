@@ -0,0 +1,105 @@
+import time
+from collections import deque, namedtuple
+
+#progress reporting
+#the engines call callback(event) once per generation; with no callback they
+#build no events at all. Throttle and History sit between the engine and any
+#renderer, StreamlitProgress updates one placeholder and one chart in place.
+
+#best individual of a generation: its fitness (tour length or string distance,
+#lower is better), the individual itself and whether the run ended
+GenerationEvent = namedtuple("GenerationEvent", ["generation", "fitness", "best", "done"])
+
+
+class Throttle:
+    """
+    Forwarding events at most once every min_interval seconds, or on every
+    generation that is a multiple of every. The final event always goes through.
+    """
+
+    def __init__(self, callback, min_interval=0.25, every=None):
+        self.callback = callback
+        self.min_interval = min_interval
+        self.every = every
+        self._last = float("-inf")
+
+    def __call__(self, event):
+        now = time.perf_counter()
+        due = now - self._last >= self.min_interval
+        if self.every:
+            due = due or event.generation % self.every == 0
+        if due or event.done:
+            self._last = now
+            self.callback(event)
+
+
+class History:
+    """
+    Ring buffer of the last maxlen (generation, fitness) records.
+    """
+
+    def __init__(self, maxlen=1000):
+        self.records = deque(maxlen=maxlen)
+
+    def __call__(self, event):
+        self.records.append((event.generation, event.fitness))
+
+    def columns(self):
+        generations = [generation for generation, _ in self.records]
+        fitness = [value for _, value in self.records]
+        return generations, fitness
+
+
+def fan_out(*callbacks):
+    """
+    One callback that forwards every event to each of the given callbacks.
+    """
+    callbacks = [callback for callback in callbacks if callback is not None]
+
+    def callback(event):
+        for forward in callbacks:
+            forward(event)
+    return callback
+
+
+class StreamlitProgress:
+    """
+    Live progress on a Streamlit page: one text placeholder and one line chart
+    of the recent best fitness, both redrawn in place at most every
+    min_interval seconds.
+    Input:
+    1- Label of the fitness axis
+    2- Minimum seconds between redraws
+    3- Number of generations kept in the chart
+    4- Function turning an event into the text shown above the chart,
+       "Generation: g <label>: value" by default
+    5- Function returning the (generations, fitness) columns to chart, such
+       as ga.jobs.Job.columns for a polled job; the received events by default
+    """
+
+    def __init__(self, label="Fitness", min_interval=0.25, maxlen=1000, describe=None, columns=None):
+        import streamlit as st
+
+        self.label = label
+        self.describe = describe
+        self.columns = columns
+        self.history = History(maxlen)
+        self._text = st.empty()
+        self._chart = st.empty()
+        self._render = Throttle(self.render, min_interval)
+
+    def __call__(self, event):
+        self.history(event)
+        self._render(event)
+
+    def render(self, event):
+        if self.describe is not None:
+            self._text.write(self.describe(event))
+        else:
+            self._text.write('Generation: ' + str(event.generation) + ' ' + self.label + ': ' + str(event.fitness))
+        # a polled job records every generation, the events received here
+        # are only the ones seen at each poll
+        generations, fitness = self.columns() if self.columns is not None else ([], [])
+        if not generations:
+            generations, fitness = self.history.columns()
+        self._chart.line_chart({"Generation": generations, self.label: fitness}, x="Generation", y=self.label)
@@ -0,0 +1,118 @@
+import numpy as np
+
+#random numbers
+#every random draw goes through a numpy Generator. A run builds one from its
+#seed with get_rng and passes it down; functions called without one use the
+#shared module generator. Parallel islands and workers get independent child
+#streams from spawn, so one seed reproduces a whole run.
+
+BIT_GENERATORS = {
+    "pcg64": np.random.PCG64,
+    "philox": np.random.Philox,
+}
+
+_default = np.random.Generator(np.random.PCG64())
+
+
+def make_rng(seed=None, bit_generator="pcg64"):
+    """
+    New Generator seeded with seed, an int, a SeedSequence or None for fresh entropy.
+    Input:
+    1- Seed
+    2- Bit generator, a name from BIT_GENERATORS
+    Output:
+    numpy Generator
+    """
+    try:
+        bit_generator = BIT_GENERATORS[bit_generator]
+    except KeyError:
+        raise ValueError(f"unknown bit generator {bit_generator!r}, expected one of {sorted(BIT_GENERATORS)}") from None
+    return np.random.Generator(bit_generator(seed))
+
+
+def get_rng(rng=None):
+    """
+    Generator for an rng argument: the shared generator for None, a new one
+    for a seed, and a Generator unchanged.
+    """
+    if rng is None:
+        return _default
+    if isinstance(rng, np.random.Generator):
+        return rng
+    return make_rng(rng)
+
+
+def seed(value=None):
+    """
+    Reseeding the shared generator used by calls that are not given one.
+    """
+    global _default
+    _default = make_rng(value)
+
+
+def spawn(rng, n):
+    """
+    n independent child Generators of rng, for islands and worker processes.
+    """
+    return get_rng(rng).spawn(n)
+
+
+def rng_state(rng):
+    """
+    State of a Generator as plain values, fit for JSON.
+    """
+    return _plain_state(rng.bit_generator.state)
+
+
+def rng_from_state(state):
+    """
+    Generator continuing exactly where the one that produced state stopped.
+    """
+    bit_generator = getattr(np.random, state["bit_generator"])()
+    bit_generator.state = state
+    return np.random.Generator(bit_generator)
+
+
+def _plain_state(value):
+    if isinstance(value, dict):
+        return {key: _plain_state(item) for key, item in value.items()}
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+    return value
+
+
+class RandomBlock:
+    """
+    Uniform numbers drawn from a Generator block_size at a time and handed
+    out in slices, so loops that need a few numbers per step do not pay a
+    Generator call per step.
+    Input:
+    1- Generator or seed
+    2- Numbers drawn per block
+    """
+
+    def __init__(self, rng=None, block_size=4096):
+        self.rng = get_rng(rng)
+        self.block_size = block_size
+        self._block = np.empty(0)
+        self._next = 0
+
+    def random(self, n=None):
+        """
+        One uniform float in [0, 1) for n None, an array of n of them otherwise.
+        """
+        count = 1 if n is None else n
+        if self._next + count > len(self._block):
+            self._block = np.concatenate([self._block[self._next:],
+                                          self.rng.random(max(self.block_size, count))])
+            self._next = 0
+        values = self._block[self._next:self._next + count]
+        self._next += count
+        return values[0] if n is None else values
+
+    def integers(self, high, n=None):
+        """
+        Integers in [0, high), high a scalar or an array of bounds.
+        """
+        values = np.floor(self.random(n) * high).astype(np.int64)
+        return np.minimum(values, np.asarray(high) - 1)
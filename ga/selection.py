@@ -0,0 +1,129 @@
+import numpy as np
+
+from ga.rng import get_rng
+
+#selection
+#every sampler takes the fitness probabilities of one generation, the number
+#of parents to draw and optionally a Generator, and returns the indices of the
+#selected individuals
+
+def cumulative_distribution(fitness_probs):
+    """
+    Cumulative distribution of the fitness probabilities, normalised so the
+    last entry is exactly 1.
+    """
+    cumsum = np.cumsum(fitness_probs, dtype=np.float64)
+    return cumsum / cumsum[-1]
+
+
+def roulette_wheel(fitness_probs, n_select, rng=None):
+    """
+    Implement selection strategy based on roulette wheel proportionate selection,
+    drawing all parents with one binary search over the cumulative distribution.
+    Input:
+    1- fitness probabilities
+    2- number of individuals to select
+    Output:
+    indices of the selected individuals
+    """
+    cumsum = cumulative_distribution(fitness_probs)
+    selected = np.searchsorted(cumsum, get_rng(rng).random(n_select), side="right")
+    return np.minimum(selected, len(cumsum) - 1)
+
+
+def stochastic_universal_sampling(fitness_probs, n_select, rng=None):
+    """
+    Selecting with n_select evenly spaced pointers over the cumulative
+    distribution, which keeps the spread of the draws close to the expected one.
+    Input:
+    1- fitness probabilities
+    2- number of individuals to select
+    Output:
+    indices of the selected individuals, in random order
+    """
+    rng = get_rng(rng)
+    cumsum = cumulative_distribution(fitness_probs)
+    pointers = (rng.random() + np.arange(n_select)) / n_select
+    selected = np.minimum(np.searchsorted(cumsum, pointers, side="right"), len(cumsum) - 1)
+    rng.shuffle(selected)
+    return selected
+
+
+def tournament(fitness_probs, n_select, tournament_size=3, rng=None):
+    """
+    Selecting the fittest of tournament_size random contestants, n_select times.
+    Input:
+    1- fitness probabilities
+    2- number of individuals to select
+    3- contestants per tournament
+    Output:
+    indices of the selected individuals
+    """
+    fitness_probs = np.asarray(fitness_probs)
+    contestants = get_rng(rng).integers(0, len(fitness_probs), (n_select, tournament_size))
+    winners = np.argmax(fitness_probs[contestants], axis=1)
+    return contestants[np.arange(n_select), winners]
+
+
+class AliasTable:
+    """
+    Vose alias table, built in O(n) and sampled in O(1) per draw.
+    """
+
+    def __init__(self, fitness_probs):
+        fitness_probs = np.asarray(fitness_probs, dtype=np.float64)
+        n = len(fitness_probs)
+        scaled = fitness_probs * (n / fitness_probs.sum())
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+
+        small = [i for i in range(n) if scaled[i] < 1.0]
+        large = [i for i in range(n) if scaled[i] >= 1.0]
+        while small and large:
+            less = small.pop()
+            more = large.pop()
+            self.prob[less] = scaled[less]
+            self.alias[less] = more
+            scaled[more] = scaled[more] + scaled[less] - 1.0
+            if scaled[more] < 1.0:
+                small.append(more)
+            else:
+                large.append(more)
+
+    def draw(self, n_select, rng=None):
+        rng = get_rng(rng)
+        columns = rng.integers(0, len(self.prob), n_select)
+        keep = rng.random(n_select) < self.prob[columns]
+        return np.where(keep, columns, self.alias[columns])
+
+
+def alias_method(fitness_probs, n_select, rng=None):
+    """
+    Implement roulette wheel selection by sampling a Vose alias table.
+    Input:
+    1- fitness probabilities
+    2- number of individuals to select
+    Output:
+    indices of the selected individuals
+    """
+    return AliasTable(fitness_probs).draw(n_select, rng)
+
+
+SELECTIONS = {
+    "roulette": roulette_wheel,
+    "sus": stochastic_universal_sampling,
+    "tournament": tournament,
+    "alias": alias_method,
+}
+
+
+def get_selection(selection):
+    """
+    Looking up a selection strategy by name; callables are returned unchanged.
+    """
+    if callable(selection):
+        return selection
+    try:
+        return SELECTIONS[selection]
+    except KeyError:
+        raise ValueError(f"unknown selection {selection!r}, expected one of {sorted(SELECTIONS)}") from None
@@ -0,0 +1,130 @@
+import math
+
+import numpy as np
+
+#spatial index
+#k nearest neighbour candidate lists straight from the coordinates, with a
+#k-d tree when scipy is installed and a uniform grid otherwise, and a distance
+#oracle that computes distances on demand. Together they let the GA, mutation
+#and local search run on instances too large for an n x n distance matrix.
+
+#city count above which callers should switch from a distance matrix to a
+#DistanceOracle, 4000 cities make a 128 MB float64 matrix
+MAX_MATRIX_CITIES = 4000
+#index types DistanceOracle looks up one distance for
+_SCALARS = (int, np.integer)
+
+def knn_grid(coords, k=8):
+    """
+    k nearest neighbours of every city through a uniform grid of about k
+    cities per cell. Each cell searches a growing square of cells until its
+    k-th neighbour is closer than the unsearched area, so results are exact.
+    Input:
+    1- City coordinates, shape (n_cities, 2)
+    2- Number of neighbours
+    Output:
+    Array of shape (n_cities, k), closest first
+    """
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    n_cities = len(coords)
+    k = min(k, n_cities - 1)
+    if k <= 0:
+        return np.empty((n_cities, 0), dtype=np.intp)
+
+    low = coords.min(axis=0)
+    span = float((coords.max(axis=0) - low).max()) or 1.0
+    side = max(1, int(math.sqrt(n_cities / k)))
+    cell_size = span / side
+    cell_xy = np.minimum(((coords - low) / cell_size).astype(np.intp), side - 1)
+    cell = cell_xy[:, 0] * side + cell_xy[:, 1]
+    # cities sorted by cell, so a column of cells is one contiguous slice
+    order = np.argsort(cell, kind="stable")
+    starts = np.searchsorted(cell[order], np.arange(side * side + 1))
+
+    neighbours = np.empty((n_cities, k), dtype=np.intp)
+    for c in np.unique(cell):
+        cx, cy = divmod(int(c), side)
+        members = order[starts[c]:starts[c + 1]]
+        radius = 1
+        while True:
+            x0, x1 = max(cx - radius, 0), min(cx + radius, side - 1)
+            y0, y1 = max(cy - radius, 0), min(cy + radius, side - 1)
+            candidates = np.concatenate([order[starts[x * side + y0]:starts[x * side + y1 + 1]]
+                                         for x in range(x0, x1 + 1)])
+            whole_grid = x0 == 0 and y0 == 0 and x1 == side - 1 and y1 == side - 1
+            if len(candidates) > k:
+                diff = coords[members][:, None, :] - coords[candidates][None, :, :]
+                squared = (diff ** 2).sum(axis=2)
+                squared[members[:, None] == candidates[None, :]] = np.inf
+                nearest = np.argpartition(squared, k - 1, axis=1)[:, :k]
+                nearest_squared = np.take_along_axis(squared, nearest, axis=1)
+                if whole_grid or nearest_squared.max() <= (radius * cell_size) ** 2:
+                    closest_first = np.argsort(nearest_squared, axis=1, kind="stable")
+                    neighbours[members] = candidates[np.take_along_axis(nearest, closest_first, axis=1)]
+                    break
+            radius += 1
+    return neighbours
+
+
+def knn(coords, k=8):
+    """
+    k nearest neighbours of every city, closest first, in O(n log n): a
+    scipy k-d tree when scipy is installed, the uniform grid otherwise.
+    Input:
+    1- City coordinates, shape (n_cities, 2)
+    2- Number of neighbours
+    Output:
+    Array of shape (n_cities, k)
+    """
+    try:
+        from scipy.spatial import cKDTree
+    except ImportError:
+        return knn_grid(coords, k)
+
+    coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+    n_cities = len(coords)
+    k = min(k, n_cities - 1)
+    if k <= 0:
+        return np.empty((n_cities, 0), dtype=np.intp)
+    _, nearest = cKDTree(coords).query(coords, k + 1)
+    # drop each city itself; with duplicate points it may not come first
+    is_self = nearest == np.arange(n_cities)[:, None]
+    is_self[~is_self.any(axis=1), -1] = True
+    return nearest[~is_self].reshape(n_cities, k).astype(np.intp)
+
+
+class DistanceOracle:
+    """
+    Euclidean distances computed from the coordinates when asked for, indexed
+    like a distance matrix: oracle[a, b] for scalars or arrays of cities and
+    oracle[i] for the row of city i. Nothing is cached: the scalar lookups
+    local search makes cost about as much as a dictionary lookup, and a row
+    costs O(n_cities), more than the few lookups it would serve.
+    Input:
+    1- City coordinates, shape (n_cities, 2); memory-mapped arrays stay mapped
+    """
+
+    def __init__(self, coords):
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.shape = (len(self.coords), len(self.coords))
+        self.dtype = np.dtype(np.float64)
+        self._x, self._y = self.coords[:, 0], self.coords[:, 1]
+
+    def __len__(self):
+        return len(self.coords)
+
+    def row(self, i):
+        return np.sqrt((self._x - self._x[i]) ** 2 + (self._y - self._y[i]) ** 2)
+
+    def distance(self, a, b):
+        dx, dy = self._x[a] - self._x[b], self._y[a] - self._y[b]
+        return math.sqrt(dx * dx + dy * dy)
+
+    def __getitem__(self, key):
+        if type(key) is not tuple:
+            return self.row(key)
+        a, b = key
+        if isinstance(a, _SCALARS) and isinstance(b, _SCALARS):
+            return self.distance(a, b)
+        diff = self.coords[a] - self.coords[b]
+        return np.sqrt((diff ** 2).sum(axis=-1))
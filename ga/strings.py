@@ -0,0 +1,537 @@
+from collections import namedtuple
+
+import numpy as np
+
+from ga.checkpoint import checkpointer, load_checkpoint
+from ga.profiling import sections
+from ga.progress import GenerationEvent
+from ga.rng import get_rng, rng_from_state, rng_state
+from ga.termination import AnyOf, MaxGenerations, Stagnation, TargetFitness
+
+#string matching GA
+#the population is a (POP_SIZE, len(TARGET)) uint8 array of gene indices and
+#fitness is the number of positions that differ from the target, so 0 fitness
+#means target found. Every step works on the whole population at once.
+
+#POP_SIZE: Number of Chromosomes in our list.
+POP_SIZE = 500
+#MUT_RATE: Rate at which our string will be changed.
+MUT_RATE = 0.2
+#GENES: Options from which our population would be created.
+GENES = ' abcdefghijklmnopqrstuvwxyz'
+#MATING_SHARE: Share of the fittest chromosomes that make up the mating pool.
+MATING_SHARE = 0.5
+
+#result of a run: best chromosome, the generation it was reached in, its
+#fitness and the termination condition that ended the run
+StringResult = namedtuple("StringResult", ["chromosome", "generation", "fitness", "stop_reason"])
+
+#encoding
+
+def encode(TARGET, GENES=GENES):
+    """
+    Mapping a string to gene indices. Characters that are not genes get a code
+    no chromosome can hold, so they never match.
+    """
+    if len(GENES) > 255:
+        raise ValueError("at most 255 genes fit in a uint8 code")
+    lookup = {gene: i for i, gene in enumerate(GENES)}
+    return np.array([lookup.get(char, 255) for char in TARGET], dtype=np.uint8)
+
+
+def decode(chromosome, GENES=GENES):
+    """
+    Mapping gene indices back to a string.
+    """
+    return ''.join([GENES[i] for i in chromosome.tolist()])
+
+#initialization
+
+def initialize_pop(TARGET, POP_SIZE=POP_SIZE, GENES=GENES, rng=None):
+    return get_rng(rng).integers(0, len(GENES), (POP_SIZE, len(TARGET)), dtype=np.uint8)
+
+#fitness calculation
+#0 fitness means target found
+
+def fitness_cal(target_codes, population, chunk_bytes=2**24, out=None, scratch=None):
+    """
+    Hamming distance of every chromosome to the target, computed in row
+    chunks so the comparison never needs more than chunk_bytes at once.
+    Input:
+    1- Encoded target
+    2- Population array
+    3- Bytes compared at once
+    4- Optional int64 array to write the fitness into
+    5- Optional bool array shaped like the population, used instead of chunks
+    Output:
+    Fitness array, one value per chromosome
+    """
+    fitness = np.empty(len(population), dtype=np.int64) if out is None else out
+    if scratch is not None:
+        np.not_equal(population, target_codes, out=scratch)
+        return scratch.sum(axis=1, out=fitness)
+    rows = max(1, chunk_bytes // max(population.shape[1], 1))
+    for start in range(0, len(population), rows):
+        fitness[start:start + rows] = np.count_nonzero(population[start:start + rows] != target_codes, axis=1)
+    return fitness
+
+#selection
+#the mating pool is the MATING_SHARE fittest chromosomes, at least one. It is
+#found with a partial sort in O(n), so the pool comes in no particular order
+
+def mating_pool_size(POP_SIZE=POP_SIZE, n_population=None):
+    n_population = POP_SIZE if n_population is None else n_population
+    return min(max(1, int(MATING_SHARE*POP_SIZE)), n_population)
+
+
+def selection(fitness, POP_SIZE=POP_SIZE):
+    """
+    Indices of the mating pool, unordered.
+    """
+    pool_size = mating_pool_size(POP_SIZE, len(fitness))
+    return np.argpartition(fitness, pool_size - 1)[:pool_size]
+
+#crossover
+
+def crossover(selected_chromo, population, POP_SIZE=POP_SIZE, rng=None, buffers=None):
+    """
+    One child per chromosome: a parent from the mating pool up to a random cut
+    point, then any member of the population. All cut points are applied with
+    one gather over the whole batch.
+    Input:
+    1- Mating pool, chromosomes or a view of the population
+    2- Population array
+    3- Number of children
+    4- Generator or seed, see ga.rng
+    5- Optional GenerationBuffers; the children are then written into
+       buffers.children without allocating
+    Output:
+    Children array of shape (POP_SIZE, len(TARGET))
+    """
+    rng = get_rng(rng)
+    CHROMO_LEN = population.shape[1]
+    parent1_indices = rng.integers(0, len(selected_chromo), POP_SIZE)
+    parent2_indices = rng.integers(0, len(population), POP_SIZE)
+    crossover_point = rng.integers(1, max(CHROMO_LEN, 2), POP_SIZE)
+    if buffers is None:
+        from_parent1 = np.arange(CHROMO_LEN) < crossover_point[:, None]
+        return np.where(from_parent1, selected_chromo[parent1_indices], population[parent2_indices])
+
+    children = buffers.children
+    np.take(population, parent2_indices, axis=0, out=children)
+    np.take(selected_chromo, parent1_indices, axis=0, out=buffers.parents)
+    np.less(buffers.columns, crossover_point[:, None], out=buffers.mask)
+    np.copyto(children, buffers.parents, where=buffers.mask)
+    return children
+
+#mutation
+
+def mutate(offspring, MUT_RATE, GENES=GENES, rng=None):
+    """
+    Replacing every gene with a random one with probability MUT_RATE. The
+    number of mutations is drawn once and only those genes are touched.
+    """
+    rng = get_rng(rng)
+    n_mutations = rng.binomial(offspring.size, min(max(MUT_RATE, 0.0), 1.0))
+    genes = offspring.reshape(-1)
+    genes[rng.integers(0, offspring.size, n_mutations)] = rng.integers(0, len(GENES), n_mutations)
+    return offspring
+
+#replacement
+
+def replace(new_gen, new_fitness, population, fitness, better=None, spare=None, spare_fitness=None):
+    """
+    Every child replaces the chromosome in its slot when it is fitter, in place.
+    An optional bool array receives which slots were replaced; optional spare
+    arrays of the population's and the fitness's shape receive the improved
+    children and their fitness on the way, instead of new arrays.
+    """
+    better = np.less(new_fitness, fitness, out=better)
+    # copying by row index only touches the improved rows, a masked copyto
+    # walks every byte of the population
+    rows = np.flatnonzero(better)
+    population[rows] = np.take(new_gen, rows, axis=0, out=None if spare is None else spare[:len(rows)])
+    fitness[rows] = np.take(new_fitness, rows, out=None if spare_fitness is None else spare_fitness[:len(rows)])
+    return population, fitness
+
+#buffers
+
+class GenerationBuffers:
+    """
+    Arrays a run reuses every generation: the population and a spare of the
+    same shape that are swapped after each partition, the children, the
+    parents gathered from the mating pool, the crossover mask and the fitness
+    arrays, so a generation allocates no population-sized array.
+    """
+
+    def __init__(self, POP_SIZE, length):
+        self.population = np.empty((POP_SIZE, length), dtype=np.uint8)
+        self.spare = np.empty_like(self.population)
+        self.children = np.empty_like(self.population)
+        self.parents = np.empty_like(self.population)
+        self.mask = np.empty((POP_SIZE, length), dtype=bool)
+        self.columns = np.arange(length)
+        self.fitness = np.empty(POP_SIZE, dtype=np.int64)
+        self.spare_fitness = np.empty_like(self.fitness)
+        self.new_fitness = np.empty_like(self.fitness)
+        self.better = np.empty(POP_SIZE, dtype=bool)
+
+    def partition(self, pool_size, groups=1):
+        """
+        Moving the pool_size fittest chromosomes to the front of the
+        population through the spare buffer, then swapping the two. With
+        groups, the rows are that many equal populations one after the
+        other, each partitioned on its own.
+        """
+        if groups == 1:
+            order = np.argpartition(self.fitness, pool_size - 1)
+        else:
+            n_population = len(self.fitness) // groups
+            order = np.argpartition(self.fitness.reshape(groups, n_population), pool_size - 1, axis=1)
+            order += np.arange(0, len(self.fitness), n_population)[:, None]
+            order = order.reshape(-1)
+        np.take(self.population, order, axis=0, out=self.spare)
+        np.take(self.fitness, order, out=self.spare_fitness)
+        self.population, self.spare = self.spare, self.population
+        self.fitness, self.spare_fitness = self.spare_fitness, self.fitness
+
+
+def step(buffers, target_codes, pool_size, MUT_RATE=MUT_RATE, GENES=GENES, rng=None, profiler=None):
+    """
+    One generation on the population and fitness held by the buffers, in place.
+    Input:
+    1- GenerationBuffers holding the current population and its fitness
+    2- Encoded target
+    3- Size of the mating pool, see mating_pool_size
+    4- Mutation rate
+    5- Genes the strings are built from
+    6- Generator or seed, see ga.rng
+    7- Optional ga.profiling.Profiler timing every operator
+    Output:
+    Index of the fittest chromosome of buffers.population
+    """
+    timed = sections(profiler)
+
+    # 3.1) select best people from current population: the mating pool is
+    # moved to the front of the population, no full sort needed
+    with timed("selection"):
+        buffers.partition(pool_size)
+        population, fitness = buffers.population, buffers.fitness
+
+    # 3.2) mate parents from the pool to make new generation
+    with timed("crossover"):
+        crossovered = crossover(population[:pool_size], population, len(population), rng, buffers)
+
+    # 3.3) mutating the children to diversify the new generation
+    with timed("mutate"):
+        mutated = mutate(crossovered, MUT_RATE, GENES, rng)
+    with timed("fitness"):
+        new_fitness = fitness_cal(target_codes, mutated, out=buffers.new_fitness, scratch=buffers.mask)
+    if profiler is not None:
+        profiler.evaluated(len(mutated))
+
+    # 3.4) replacement of bad population with new generation
+    # the pool is at the front, so the children there compete with the fittest
+    with timed("replace"):
+        # the spare arrays are free until the next partition
+        replace(mutated, new_fitness, population, fitness, buffers.better, buffers.spare, buffers.spare_fitness)
+        return np.argmin(fitness)
+
+#main
+
+def run_ga(TARGET, POP_SIZE=POP_SIZE, MUT_RATE=MUT_RATE, GENES=GENES, callback=None, seed=None,
+           termination=None, max_generations=None, checkpoint=None, checkpoint_every=100, resume_from=None,
+           profiler=None):
+    """
+    Evolving random strings until one matches TARGET or a termination policy fires.
+    Input:
+    1- Target string
+    2- Number of chromosomes
+    3- Mutation rate
+    4- Genes the strings are built from
+    5- Optional callback receiving a ga.progress.GenerationEvent every generation
+    6- RNG seed or Generator, for repeatable runs, see ga.rng
+    7- Termination policy from ga.termination, Stagnation(1000) by default so a
+       run that cannot improve (for example MUT_RATE 0) still ends
+    8- Maximum number of generations, None for no limit
+    9- Checkpoint path or ga.checkpoint.Checkpointer, written in the background
+    10- Generations between checkpoints, the last generation is always written
+    11- Checkpoint to continue from, with the same parameters as the
+        interrupted run; seed is then ignored
+    12- Optional ga.profiling.Profiler timing every operator of every generation
+    Output:
+    StringResult with the best chromosome, its generation, its fitness and the
+    name of the condition that stopped the run
+    """
+    rng = get_rng(seed)
+    target_codes = encode(TARGET, GENES)
+    policy = AnyOf(TargetFitness(0),
+                   None if max_generations is None else MaxGenerations(max_generations),
+                   Stagnation(1000) if termination is None else termination)
+    policy.reset()
+    writer = checkpointer(checkpoint, checkpoint_every)
+    timed = sections(profiler)
+
+    if resume_from is not None:
+        arrays, meta = load_checkpoint(resume_from)
+        rng = rng_from_state(meta["rng"])
+        population, fitness = arrays["population"], arrays["fitness"]
+        generation = meta["generation"]
+        best = np.argmin(fitness)
+        # a finished run is only extended when its limits were raised; the
+        # check must not advance the saved policy counters
+        stop_reason = policy.check(generation, fitness[best], population)
+        policy.restore(meta["policy"])
+        if stop_reason is not None:
+            return StringResult(decode(population[best], GENES), generation, int(fitness[best]), stop_reason)
+        generation += 1
+    else:
+        # 1) initialize population
+        population = initialize_pop(TARGET, POP_SIZE, GENES, rng)
+        generation = 1
+
+        # 2) Calculating the fitness for the current population
+        fitness = fitness_cal(target_codes, population)
+
+    # every array of the loop is allocated once, here
+    buffers = GenerationBuffers(*population.shape)
+    buffers.population[...], buffers.fitness[...] = population, fitness
+    pool_size = mating_pool_size(POP_SIZE, len(population))
+
+    if profiler is not None:
+        profiler.start()
+    # 3) now we loop until TARGET is found or the policy stops the run
+    while True:
+        best = step(buffers, target_codes, pool_size, MUT_RATE, GENES, rng, profiler)
+        population, fitness = buffers.population, buffers.fitness
+
+        with timed("termination"):
+            stop_reason = policy.check(generation, fitness[best], population)
+        if callback is not None:
+            with timed("callback"):
+                callback(GenerationEvent(generation, int(fitness[best]), decode(population[best], GENES),
+                                         stop_reason is not None))
+        if writer is not None and (writer.due(generation) or stop_reason is not None):
+            with timed("checkpoint"):
+                writer.save({"population": population, "fitness": fitness},
+                            {"generation": generation, "stop_reason": stop_reason, "policy": policy.state(),
+                             "rng": rng_state(rng)})
+        if profiler is not None:
+            profiler.end_generation(generation)
+        if stop_reason is not None:
+            if writer is not None:
+                writer.flush()
+            if profiler is not None:
+                profiler.stop()
+            return StringResult(decode(population[best], GENES), generation, int(fitness[best]), stop_reason)
+        generation += 1
+
+#batch mode
+#many targets evolve together in one (n_targets, POP_SIZE, length) array per
+#bucket. Targets are bucketed by length rounded up to a multiple of
+#BUCKET_WIDTH, and sparse buckets are merged into longer ones while the
+#padding is cheaper than a bucket step of their own; padding never counts
+#towards fitness. Every kernel works on the whole bucket at once, and a
+#target leaves its bucket as soon as it is found or stopped, so finished
+#targets cost nothing.
+
+#progress of a batch run: generation, summed best fitness over all targets
+#(0 once all are found), number of targets still evolving, whether it ended
+BatchEvent = namedtuple("BatchEvent", ["generation", "fitness", "active", "done"])
+
+
+#BUCKET_WIDTH: Targets whose lengths round up to the same multiple of it share a bucket.
+BUCKET_WIDTH = 4
+#BUCKET_OVERHEAD_GENES: Work of a bucket step that does not grow with the bucket,
+#as the number of genes that take as long to evolve.
+BUCKET_OVERHEAD_GENES = 2**12
+
+
+def bucket_length(length):
+    """
+    Padded length of a target. Wider buckets hold more targets but waste
+    more work on padding.
+    """
+    return -(-length // BUCKET_WIDTH) * BUCKET_WIDTH
+
+
+def merge_buckets(by_length, POP_SIZE=POP_SIZE):
+    """
+    Moving the targets of each padded length into the bucket of a longer one
+    while the padding that adds costs fewer genes than BUCKET_OVERHEAD_GENES,
+    so a few targets of scattered lengths do not each pay for a bucket.
+    Input:
+    1- Dict of padded length to target indices
+    2- Number of chromosomes per target
+    Output:
+    Dict of padded length to target indices, longest targets first
+    """
+    merged = {}
+    current = None
+    for length in sorted(by_length, reverse=True):
+        indices = by_length[length]
+        if current is not None and len(indices) * (current - length) * POP_SIZE <= BUCKET_OVERHEAD_GENES:
+            merged[current].extend(indices)
+        else:
+            current = length
+            merged[current] = list(indices)
+    return merged
+
+
+def batch_fitness(target_codes, valid, population, out=None, scratch=None):
+    """
+    Hamming distance of every chromosome to its own target.
+    Input:
+    1- Padded encoded targets, shape (n_targets, length)
+    2- Mask of the real, unpadded positions, same shape
+    3- Population array of shape (n_targets, POP_SIZE, length), or its
+       (n_targets * POP_SIZE, length) rows
+    4- Optional int64 array of shape (n_targets, POP_SIZE) to write into
+    5- Optional bool array shaped like the population for the comparison
+    Output:
+    Fitness array of shape (n_targets, POP_SIZE)
+    """
+    population = population.reshape(len(target_codes), -1, target_codes.shape[1])
+    if scratch is None:
+        differs = (population != target_codes[:, None, :]) & valid[:, None, :]
+    else:
+        differs = np.not_equal(population, target_codes[:, None, :], out=scratch.reshape(population.shape))
+        differs &= valid[:, None, :]
+    return differs.sum(axis=2, out=out)
+
+
+def batch_step(buffers, target_codes, valid, MUT_RATE=MUT_RATE, GENES=GENES, rng=None):
+    """
+    One generation for every target of a bucket, in place: selection of each
+    target's mating pool by partial sort, crossover within each target's
+    population, mutation and slot-wise replacement. The populations are the
+    rows of the GenerationBuffers, one target after the other, so a
+    generation allocates no population-sized array.
+    """
+    rng = get_rng(rng)
+    n_targets, length = target_codes.shape
+    n_population = len(buffers.fitness) // n_targets
+    pool_size = mating_pool_size(n_population)
+    buffers.partition(pool_size, n_targets)
+    population = buffers.population
+    first_row = np.arange(0, n_targets * n_population, n_population)[:, None]
+
+    parent1_rows = (rng.integers(0, pool_size, (n_targets, n_population)) + first_row).reshape(-1)
+    parent2_rows = (rng.integers(0, n_population, (n_targets, n_population)) + first_row).reshape(-1)
+    crossover_point = rng.integers(1, max(length, 2), (len(population), 1))
+    np.take(population, parent2_rows, axis=0, out=buffers.children)
+    np.take(population, parent1_rows, axis=0, out=buffers.parents)
+    np.less(buffers.columns, crossover_point, out=buffers.mask)
+    np.copyto(buffers.children, buffers.parents, where=buffers.mask)
+
+    mutate(buffers.children, MUT_RATE, GENES, rng)
+    batch_fitness(target_codes, valid, buffers.children, buffers.new_fitness.reshape(n_targets, n_population),
+                  buffers.mask)
+    replace(buffers.children, buffers.new_fitness, population, buffers.fitness, buffers.better, buffers.spare,
+            buffers.spare_fitness)
+
+
+class _Bucket:
+    """
+    Targets of one padded length evolving together, with the indices they
+    have in the list passed to run_batch. Their populations live in one
+    GenerationBuffers, which is only reallocated when targets leave.
+    """
+
+    def __init__(self, indices, targets, POP_SIZE, GENES, rng):
+        length = bucket_length(max(len(target) for target in targets))
+        self.indices = np.asarray(indices)
+        self.target_codes = np.zeros((len(targets), length), dtype=np.uint8)
+        self.valid = np.zeros((len(targets), length), dtype=bool)
+        for i, target in enumerate(targets):
+            self.target_codes[i, :len(target)] = encode(target, GENES)
+            self.valid[i, :len(target)] = True
+        self.buffers = GenerationBuffers(len(targets) * POP_SIZE, length)
+        self.buffers.population[...] = rng.integers(0, len(GENES), self.buffers.population.shape, dtype=np.uint8)
+        batch_fitness(self.target_codes, self.valid, self.buffers.population, self.fitness)
+        self.best = self.fitness.min(axis=1)
+        self.since = np.zeros(len(targets), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.indices)
+
+    @property
+    def population(self):
+        return self.buffers.population.reshape(len(self), -1, self.target_codes.shape[1])
+
+    @property
+    def fitness(self):
+        return self.buffers.fitness.reshape(len(self), -1)
+
+    def keep(self, active):
+        population, fitness = self.population[active], self.fitness[active]
+        for name in ("indices", "target_codes", "valid", "best", "since"):
+            setattr(self, name, getattr(self, name)[active])
+        self.buffers = GenerationBuffers(population.shape[0] * population.shape[1], population.shape[2])
+        self.buffers.population[...] = population.reshape(self.buffers.population.shape)
+        self.buffers.fitness[...] = fitness.reshape(-1)
+
+
+def run_batch(TARGETS, POP_SIZE=POP_SIZE, MUT_RATE=MUT_RATE, GENES=GENES, seed=None, max_generations=None,
+              stagnation=1000, callback=None, max_bytes=2**18):
+    """
+    Evolving a string population for every target at once. Each target stops
+    on its own when found, after stagnation generations without improvement
+    or at max_generations, with the stop reasons of the single target GA.
+    Input:
+    1- List of target strings
+    2- Number of chromosomes per target
+    3- Mutation rate
+    4- Genes the strings are built from
+    5- RNG seed or Generator, see ga.rng
+    6- Maximum number of generations, None for no limit
+    7- Generations without improvement before a target is given up
+    8- Optional callback receiving a BatchEvent every generation
+    9- Largest population array per bucket in bytes; bigger buckets are split,
+       and buckets small enough to stay in the CPU cache run fastest
+    Output:
+    List of StringResult, one per target in the order given
+    """
+    rng = get_rng(seed)
+    results = [None] * len(TARGETS)
+    by_length = {}
+    for i, target in enumerate(TARGETS):
+        if target:
+            by_length.setdefault(bucket_length(len(target)), []).append(i)
+        else:
+            results[i] = StringResult("", 0, 0, TargetFitness.name)
+
+    buckets = []
+    for length, indices in sorted(merge_buckets(by_length, POP_SIZE).items()):
+        per_bucket = max(1, max_bytes // (POP_SIZE * length))
+        for start in range(0, len(indices), per_bucket):
+            chunk = indices[start:start + per_bucket]
+            buckets.append(_Bucket(chunk, [TARGETS[i] for i in chunk], POP_SIZE, GENES, rng))
+
+    generation = 1
+    while buckets:
+        for bucket in buckets:
+            batch_step(bucket.buffers, bucket.target_codes, bucket.valid, MUT_RATE, GENES, rng)
+            best = bucket.fitness.min(axis=1)
+            bucket.since = np.where(best < bucket.best, 0, bucket.since + 1)
+            bucket.best = best
+
+            # same precedence as the policies of run_ga
+            found = best == 0
+            out_of_time = max_generations is not None and generation >= max_generations
+            stalled = bucket.since >= stagnation if stagnation is not None else np.zeros(len(bucket), dtype=bool)
+            finished = found | out_of_time | stalled
+            for i in np.flatnonzero(finished):
+                index, row = bucket.indices[i], bucket.fitness[i].argmin()
+                reason = TargetFitness.name if found[i] else MaxGenerations.name if out_of_time else Stagnation.name
+                chromosome = decode(bucket.population[i, row], GENES)[:len(TARGETS[index])]
+                results[index] = StringResult(chromosome, generation, int(bucket.fitness[i, row]), reason)
+            if finished.any():
+                bucket.keep(~finished)
+
+        buckets = [bucket for bucket in buckets if len(bucket)]
+        if callback is not None:
+            callback(BatchEvent(generation, int(sum(bucket.best.sum() for bucket in buckets)),
+                                sum(len(bucket) for bucket in buckets), not buckets))
+        generation += 1
+    return results
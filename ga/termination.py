@@ -0,0 +1,165 @@
+import time
+
+import numpy as np
+
+#termination
+#a policy is checked once per generation with the generation number, the best
+#fitness (lower is better) and the population, and returns the name of the
+#condition that fired or None. Policies combine with | or AnyOf. state() and
+#restore() carry their counters across a checkpoint.
+
+class Policy:
+    name = "policy"
+
+    def reset(self):
+        pass
+
+    def check(self, generation, best_fitness, population):
+        return None
+
+    def state(self):
+        return {key: value for key, value in vars(self).items() if key.startswith("_")}
+
+    def restore(self, state):
+        vars(self).update(state)
+
+    def __or__(self, other):
+        return AnyOf(self, other)
+
+    def __repr__(self):
+        params = ", ".join(f"{key}={value!r}" for key, value in vars(self).items() if not key.startswith("_"))
+        return f"{type(self).__name__}({params})"
+
+
+class MaxGenerations(Policy):
+    name = "max_generations"
+
+    def __init__(self, n_generations):
+        self.n_generations = n_generations
+
+    def check(self, generation, best_fitness, population):
+        if generation >= self.n_generations:
+            return self.name
+
+
+class MaxTime(Policy):
+    """
+    Wall-clock budget in seconds, counted from the start of the run.
+    """
+    name = "max_time"
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self._start = time.perf_counter()
+
+    def reset(self):
+        self._start = time.perf_counter()
+
+    def state(self):
+        return {"elapsed": time.perf_counter() - self._start}
+
+    def restore(self, state):
+        self._start = time.perf_counter() - state["elapsed"]
+
+    def check(self, generation, best_fitness, population):
+        if time.perf_counter() - self._start >= self.seconds:
+            return self.name
+
+
+class Stagnation(Policy):
+    """
+    No improvement of the best fitness by more than tolerance for
+    n_generations generations in a row.
+    """
+    name = "stagnation"
+
+    def __init__(self, n_generations, tolerance=0.0):
+        self.n_generations = n_generations
+        self.tolerance = tolerance
+        self.reset()
+
+    def reset(self):
+        self._best = np.inf
+        self._since = 0
+
+    def check(self, generation, best_fitness, population):
+        if best_fitness < self._best - self.tolerance:
+            self._best = best_fitness
+            self._since = 0
+            return None
+        self._since += 1
+        if self._since >= self.n_generations:
+            return self.name
+
+
+def diversity(population):
+    """
+    Share of distinct individuals in the population, 1.0 when all differ.
+    """
+    population = np.ascontiguousarray(population)
+    if len(population) == 0:
+        return 1.0
+    rows = population.view(np.dtype((np.void, population.dtype.itemsize * population.shape[1])))
+    return len(np.unique(rows)) / len(population)
+
+
+class DiversityCollapse(Policy):
+    """
+    Share of distinct individuals at or below min_diversity, measured every
+    check_every generations.
+    """
+    name = "diversity_collapse"
+
+    def __init__(self, min_diversity=0.05, check_every=10):
+        self.min_diversity = min_diversity
+        self.check_every = check_every
+
+    def check(self, generation, best_fitness, population):
+        if generation % self.check_every == 0 and diversity(population) <= self.min_diversity:
+            return self.name
+
+
+class TargetFitness(Policy):
+    name = "target_fitness"
+
+    def __init__(self, target):
+        self.target = target
+
+    def check(self, generation, best_fitness, population):
+        if best_fitness <= self.target:
+            return self.name
+
+
+class AnyOf(Policy):
+    """
+    Stopping as soon as one of the policies fires. Every policy is checked
+    each generation so stateful ones stay up to date.
+    """
+    name = "any_of"
+
+    def __init__(self, *policies):
+        self.policies = []
+        for policy in policies:
+            if isinstance(policy, AnyOf):
+                self.policies.extend(policy.policies)
+            elif policy is not None:
+                self.policies.append(policy)
+
+    def reset(self):
+        for policy in self.policies:
+            policy.reset()
+
+    def state(self):
+        return {"policies": [policy.state() for policy in self.policies]}
+
+    def restore(self, state):
+        for policy, policy_state in zip(self.policies, state["policies"]):
+            policy.restore(policy_state)
+
+    def check(self, generation, best_fitness, population):
+        fired = None
+        for policy in self.policies:
+            reason = policy.check(generation, best_fitness, population)
+            if fired is None:
+                fired = reason
+        return fired
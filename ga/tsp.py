@@ -0,0 +1,446 @@
+from collections import namedtuple
+
+import numpy as np
+
+from ga.checkpoint import checkpointer, load_checkpoint
+from ga.crossover import crossover_batch
+from ga.distance import fitness_probabilities, tour_lengths
+from ga.encoding import index_dtype
+from ga.local_search import improve_offspring, neighbour_lists
+from ga.mutation import mutate
+from ga.profiling import sections
+from ga.progress import GenerationEvent
+from ga.population import random_population
+from ga.rng import get_rng, rng_from_state, rng_state
+from ga.selection import get_selection
+from ga.termination import AnyOf, MaxGenerations, Stagnation
+
+#result of a run: final population and its tour lengths, generations run, the
+#termination condition that ended it and the best tour seen in any generation
+GAResult = namedtuple("GAResult", ["population", "lengths", "generations", "stop_reason",
+                                   "best_tour", "best_length", "best_generation"])
+
+#fitness probablity function
+
+def fitness_prob(population, dist, evaluator=None):
+    """
+    Calculating the fitness probability
+    Input:
+    1- Population array of shape (n_population, n_cities)
+    2- Distance matrix
+    3- Optional evaluator with a tour_lengths(population) method, such as
+       ga.parallel.SharedEvaluator
+    Output:
+    Population fitness probability
+    """
+    return fitness_probabilities(population_lengths(population, dist, evaluator))
+
+
+def population_lengths(population, dist, evaluator=None):
+    """
+    Tour lengths of the population, through the evaluator when there is one.
+    """
+    if evaluator is not None:
+        return evaluator.tour_lengths(population)
+    return tour_lengths(population, dist)
+
+#crossover
+
+def crossover_pairs(parents, crossover_op="one_point", rng=None, neighbours=None):
+    """
+    Crossing consecutive pairs of parents, two children per pair.
+    Input:
+    1- Parents array, an even number of rows
+    2- Crossover operator name from ga.crossover.CROSSOVERS
+    3- Generator or seed, see ga.rng
+    4- Candidate neighbour lists for ERX dead-end repair
+    Output:
+    Offspring array with the same shape as parents
+    """
+    parents_1, parents_2 = parents[0::2], parents[1::2]
+    offspring = np.empty_like(parents)
+    offspring[0::2] = crossover_batch(parents_1, parents_2, crossover_op, rng, neighbours)
+    offspring[1::2] = crossover_batch(parents_2, parents_1, crossover_op, rng, neighbours)
+    return offspring
+
+
+def make_offspring(parents, dist, mutation_per, crossover_op="one_point", mutation_op="swap", rng=None,
+                   neighbours=None, evaluate=None, profiler=None):
+    """
+    Children of consecutive pairs of parents, two per pair, with their tour
+    lengths. Only the crossover children are evaluated; mutation updates the
+    lengths of the rows it changes from the edges it replaces.
+    Input:
+    1- Parents array, an even number of rows
+    2- Distance matrix or ga.spatial.DistanceOracle
+    3- Mutation percentage
+    4- Crossover operator name from ga.crossover.CROSSOVERS
+    5- Mutation operator name from ga.mutation.MUTATIONS
+    6- Generator or seed, see ga.rng
+    7- Candidate neighbour lists; when given, mutations are neighbour moves
+       instead of mutation_op and ERX repairs dead ends through them
+    8- Function returning the lengths of a population, tour_lengths by default
+    9- Optional ga.profiling.Profiler timing crossover and mutation
+    Output:
+    1- Offspring array with the same shape as parents
+    2- Their tour lengths
+    """
+    rng = get_rng(rng)
+    timed = sections(profiler)
+    with timed("crossover"):
+        offspring = crossover_pairs(parents, crossover_op, rng, neighbours)
+    lengths = tour_lengths(offspring, dist) if evaluate is None else evaluate(offspring)
+    with timed("mutation"):
+        rows = np.flatnonzero(rng.random(len(offspring)) < mutation_per)
+        lengths[rows] += mutate(offspring, rows, mutation_op, rng, dist, neighbours)
+    return offspring, lengths
+
+
+def run_ga(dist, n_population=250, n_generations=200, crossover_per=0.8, mutation_per=0.2,
+           selection="roulette", crossover_op="one_point", memetic=False, memetic_per=0.1,
+           ls_passes=2, ls_time_budget=None, n_neighbours=8, population=None, evaluator=None,
+           seed=None, callback=None, termination=None, n_elite=2, checkpoint=None, checkpoint_every=10,
+           resume_from=None, neighbour_moves=False, mutation_op="swap", verify_every=50, profiler=None):
+    """
+    Evolving tours over the cities of a distance matrix.
+    Input:
+    1- Distance matrix of shape (n_cities, n_cities), or a ga.spatial.DistanceOracle
+       for instances too large for one
+    2- Number of population
+    3- Maximum number of generations, None for no limit
+    4- Crossover percentage
+    5- Mutation percentage
+    6- Selection strategy, a name from ga.selection.SELECTIONS or a callable with the same signature
+    7- Crossover operator, a name from ga.crossover.CROSSOVERS
+    8- Memetic mode, improving some offspring with 2-opt / Or-opt every generation
+    9- Share of offspring improved in memetic mode
+    10- Local search passes per improved tour
+    11- Local search time budget per generation, in seconds
+    12- Candidate neighbours per city for local search and neighbour moves
+    13- Starting population, random when not given
+    14- Optional evaluator used for every fitness calculation
+    15- RNG seed or Generator, for repeatable runs, see ga.rng
+    16- Optional callback receiving a ga.progress.GenerationEvent every generation
+    17- Extra termination policy from ga.termination, checked with the generation limit
+    18- Number of best tours carried into the next generation unchanged
+    19- Checkpoint path, ga.checkpoint.Checkpointer written in the background,
+        or ga.checkpoint.MemoryCheckpointer
+    20- Generations between checkpoints, the last generation is always written
+    21- Checkpoint to continue from, a path or the state of a MemoryCheckpointer,
+       with the same parameters as the interrupted run; seed and population
+       are then ignored
+    22- Restrict mutation and ERX repair to the n_neighbours nearest cities
+    23- Mutation operator, a name from ga.mutation.MUTATIONS
+    24- Generations between full re-evaluations of the population, None to
+       trust the incrementally updated lengths throughout
+    25- Optional ga.profiling.Profiler timing every operator of every generation
+    Output:
+    GAResult with the final population array of shape (n_population, n_cities)
+    and its lengths, the number of generations run, the name of the condition
+    that stopped it and the best tour found, its length and generation
+    """
+    rng = get_rng(seed)
+    n_cities = len(dist)
+    n_parents = int(crossover_per * n_population) // 2 * 2
+    select = get_selection(selection)
+    neighbours = neighbour_lists(dist, n_neighbours) if memetic or neighbour_moves else None
+    timed = sections(profiler)
+    if profiler is not None:
+        profiler.start()
+
+    def evaluate(tours):
+        with timed("evaluation"):
+            lengths = population_lengths(tours, dist, evaluator)
+        if profiler is not None:
+            profiler.evaluated(len(tours))
+        return lengths
+
+    def offspring_of(parents):
+        # local search, like mutation, updates lengths from the edges it changes
+        offspring, lengths = make_offspring(parents, dist, mutation_per, crossover_op, mutation_op, rng,
+                                            neighbours if neighbour_moves else None, evaluate, profiler)
+        if memetic:
+            with timed("local_search"):
+                improve_offspring(offspring, dist, neighbours, memetic_per, ls_passes, ls_time_budget, rng, lengths)
+        return offspring, lengths
+
+    policy = AnyOf(None if n_generations is None else MaxGenerations(n_generations), termination)
+    policy.reset()
+    writer = checkpointer(checkpoint, checkpoint_every)
+
+    if resume_from is not None:
+        # everything the loop reads is restored, so the run continues exactly
+        # as if it had not been interrupted
+        arrays, meta = resume_from if isinstance(resume_from, tuple) else load_checkpoint(resume_from)
+        rng = rng_from_state(meta["rng"])
+        population, initial_lengths = arrays["population"], arrays["initial_lengths"]
+        best_mixed_offspring, best_lengths = arrays["current"], arrays["current_lengths"]
+        best_tour, best_length, best_generation = arrays["best_tour"], meta["best_length"], meta["best_generation"]
+        generation = meta["generation"]
+        # a finished run is only extended when its limits were raised; the
+        # check must not advance the saved policy counters
+        stop_reason = policy.check(generation, best_length, best_mixed_offspring)
+        policy.restore(meta["policy"])
+    else:
+        if population is None:
+            population = random_population(n_cities, n_population, rng=rng)
+        initial_lengths = evaluate(population)
+
+        with timed("selection"):
+            parents_indices = select(fitness_probabilities(initial_lengths), n_parents, rng=rng)
+            parents = population[parents_indices]
+        offspring, offspring_lengths = offspring_of(parents)
+
+        # lengths of the current population are carried along with it, so only
+        # new offspring are ever evaluated
+        with timed("ranking"):
+            mixed_offspring = np.concatenate([parents, offspring])
+            lengths = np.concatenate([initial_lengths[parents_indices], offspring_lengths])
+            sorted_fitness_indices = np.argsort(lengths, kind="stable")[0:n_population]
+            best_mixed_offspring = mixed_offspring[sorted_fitness_indices]
+            best_lengths = lengths[sorted_fitness_indices]
+
+        # best-so-far record, updated as generations improve on it
+        best_generation = 0
+        if initial_lengths.min() < best_lengths[0]:
+            best_tour, best_length = population[np.argmin(initial_lengths)].copy(), initial_lengths.min()
+        else:
+            best_tour, best_length = best_mixed_offspring[0].copy(), best_lengths[0]
+
+        generation = 0
+        stop_reason = policy.check(generation, best_length, best_mixed_offspring)
+        if profiler is not None:
+            profiler.end_generation(generation)
+
+    n_best = int(0.8*n_population)
+    n_elite = min(n_elite, n_best, len(best_mixed_offspring))
+    while stop_reason is None:
+        generation += 1
+        with timed("selection"):
+            parents_indices = select(fitness_probabilities(best_lengths), n_parents, rng=rng)
+            parents = best_mixed_offspring[parents_indices]
+        offspring, offspring_lengths = offspring_of(parents)
+
+        with timed("ranking"):
+            mixed_offspring = np.concatenate([parents, offspring])
+            lengths = np.concatenate([best_lengths[parents_indices], offspring_lengths])
+
+            # the top n_elite of the current population survive unchanged
+            elite_indices = np.argpartition(best_lengths, n_elite)[:n_elite] if n_elite < len(best_lengths) \
+                else np.arange(len(best_lengths))
+            best_fitness_indices = np.argsort(lengths, kind="stable")[0:n_best - n_elite]
+            old_population_indices = rng.integers(0, len(population), n_population - n_best)
+
+            best_mixed_offspring = np.concatenate([best_mixed_offspring[elite_indices],
+                                                   mixed_offspring[best_fitness_indices],
+                                                   population[old_population_indices]])
+            best_lengths = np.concatenate([best_lengths[elite_indices], lengths[best_fitness_indices],
+                                           initial_lengths[old_population_indices]])
+            shuffle = rng.permutation(len(best_mixed_offspring))
+            best_mixed_offspring, best_lengths = best_mixed_offspring[shuffle], best_lengths[shuffle]
+        if verify_every and generation % verify_every == 0:
+            # incremental updates drift by rounding error, a full evaluation resets them
+            best_lengths = evaluate(best_mixed_offspring)
+
+        best = np.argmin(lengths)
+        if lengths[best] < best_length:
+            best_tour, best_length, best_generation = mixed_offspring[best].copy(), lengths[best], generation
+
+        with timed("termination"):
+            stop_reason = policy.check(generation, best_length, best_mixed_offspring)
+        if callback is not None:
+            with timed("callback"):
+                callback(GenerationEvent(generation, float(best_length), best_tour, stop_reason is not None))
+        if writer is not None and (writer.due(generation) or stop_reason is not None):
+            with timed("checkpoint"):
+                writer.save({"population": population, "initial_lengths": initial_lengths,
+                             "current": best_mixed_offspring, "current_lengths": best_lengths,
+                             "best_tour": best_tour},
+                            {"generation": generation, "best_length": float(best_length),
+                             "best_generation": best_generation, "stop_reason": stop_reason,
+                             "policy": policy.state(), "rng": rng_state(rng)})
+        if profiler is not None:
+            profiler.end_generation(generation)
+
+    if writer is not None:
+        writer.flush()
+    if profiler is not None:
+        profiler.stop()
+    return GAResult(best_mixed_offspring, best_lengths, generation, stop_reason,
+                    best_tour, float(best_length), best_generation)
+
+#batch mode
+#many small instances are solved in one pass: instances with the same number
+#of cities share a bucket, with their distance matrices stacked into an
+#(n_instances, n_cities, n_cities) array and their populations into an
+#(n_instances, n_population, n_cities) one. Selection, crossover, mutation and
+#evaluation each run once per generation for the whole bucket; crossover and
+#mutation work on the flattened rows, since tours of every instance use the
+#same city indices.
+
+def batch_lengths(dists, population):
+    """
+    Tour lengths of every tour of every instance with one gather.
+    Input:
+    1- Distance matrices, shape (n_instances, n_cities, n_cities)
+    2- Populations, shape (n_instances, n_tours, n_cities)
+    Output:
+    Array of shape (n_instances, n_tours)
+    """
+    n_instances, _, n_cities = population.shape
+    tours = population.astype(np.intp, copy=False)
+    first = (np.arange(n_instances) * n_cities * n_cities)[:, None, None]
+    edges = first + tours * n_cities + np.roll(tours, -1, axis=2)
+    return dists.reshape(-1)[edges].sum(axis=2)
+
+
+def batch_roulette(lengths, n_select, rng=None):
+    """
+    Roulette wheel selection for every instance at once, with the
+    probabilities of ga.distance.fitness_probabilities. The cumulative
+    probabilities of instance i are shifted by i, so one searchsorted over
+    all of them serves every instance.
+    Input:
+    1- Tour lengths, shape (n_instances, n_tours)
+    2- Number of tours to select per instance
+    3- Generator or seed, see ga.rng
+    Output:
+    Indices of the selected tours, shape (n_instances, n_select)
+    """
+    n_instances, n_tours = lengths.shape
+    fitness = lengths.max(axis=1, keepdims=True) - lengths
+    total = fitness.sum(axis=1, keepdims=True)
+    probs = np.where(total > 0, fitness / np.where(total > 0, total, 1.0), 1.0 / n_tours)
+    shift = np.arange(n_instances)[:, None]
+    cumulative = np.cumsum(probs, axis=1)
+    cumulative[:, -1] = 1.0
+    cumulative += shift
+    draws = get_rng(rng).random((n_instances, n_select)) + shift
+    chosen = np.searchsorted(cumulative.reshape(-1), draws.reshape(-1), side="right").reshape(n_instances, n_select)
+    return np.minimum(chosen - shift * n_tours, n_tours - 1)
+
+
+class _Bucket:
+    """
+    Instances of one size evolving together, with the indices they have in
+    the list passed to run_batch.
+    """
+
+    def __init__(self, indices, dists, n_population, rng):
+        n_cities = dists.shape[1]
+        self.indices = np.asarray(indices)
+        self.dists = dists
+        keys = rng.random((len(indices) * n_population, n_cities))
+        self.population = np.argsort(keys, axis=1).astype(index_dtype(n_cities)).reshape(
+            len(indices), n_population, n_cities)
+        self.lengths = batch_lengths(dists, self.population)
+        self.best_length = self.lengths.min(axis=1)
+        self.best_generation = np.zeros(len(indices), dtype=np.int64)
+
+    def __len__(self):
+        return len(self.indices)
+
+    def keep(self, active):
+        for name in ("indices", "dists", "population", "lengths", "best_length", "best_generation"):
+            setattr(self, name, getattr(self, name)[active])
+
+
+def batch_step(bucket, n_parents, mutation_per, crossover_op, mutation_op, rng):
+    """
+    One generation for every instance of a bucket: roulette selection of
+    n_parents per instance, crossover of consecutive pairs and mutation over
+    the flattened rows, then the best n_population of parents and children
+    together survive in each instance.
+    """
+    n_instances, n_population, n_cities = bucket.population.shape
+    rows = bucket.population.reshape(-1, n_cities)
+    first_row = np.arange(0, n_instances * n_population, n_population)[:, None]
+    parents = rows[(batch_roulette(bucket.lengths, n_parents, rng) + first_row).reshape(-1)]
+
+    offspring = crossover_pairs(parents, crossover_op, rng)
+    mutate(offspring, np.flatnonzero(rng.random(len(offspring)) < mutation_per), mutation_op, rng)
+    offspring = offspring.reshape(n_instances, n_parents, n_cities)
+    offspring_lengths = batch_lengths(bucket.dists, offspring)
+
+    mixed = np.concatenate([bucket.population, offspring], axis=1)
+    mixed_lengths = np.concatenate([bucket.lengths, offspring_lengths], axis=1)
+    survivors = np.argpartition(mixed_lengths, n_population - 1, axis=1)[:, :n_population]
+    bucket.population = np.take_along_axis(mixed, survivors[:, :, None], axis=1)
+    bucket.lengths = np.take_along_axis(mixed_lengths, survivors, axis=1)
+
+
+def run_batch(dists, n_population=100, n_generations=200, crossover_per=0.8, mutation_per=0.2,
+              crossover_op="one_point", mutation_op="swap", stagnation=None, seed=None, callback=None,
+              max_bytes=2**22):
+    """
+    Evolving tours for many small instances at once, such as thousands of
+    routes of a few dozen stops, where looping over run_ga would be dominated
+    by Python overhead. Instances may have different sizes.
+    Input:
+    1- List of distance matrices
+    2- Number of population per instance
+    3- Maximum number of generations, None for no limit (then stagnation is required)
+    4- Crossover percentage
+    5- Mutation percentage
+    6- Crossover operator, a name from ga.crossover.CROSSOVERS
+    7- Mutation operator, a name from ga.mutation.MUTATIONS
+    8- Generations without improvement after which an instance stops on its
+       own and leaves its bucket, None to run every instance to the limit
+    9- RNG seed or Generator, for repeatable runs, see ga.rng
+    10- Optional callback receiving a ga.progress.GenerationEvent every
+        generation, with the summed best length over the instances still running
+    11- Largest population array per bucket in bytes; bigger buckets are split
+    Output:
+    List of GAResult, one per instance in the order given
+    """
+    if n_generations is None and stagnation is None:
+        raise ValueError("run_batch needs n_generations or stagnation to stop")
+    rng = get_rng(seed)
+    n_parents = max(2, int(crossover_per * n_population) // 2 * 2)
+    results = [None] * len(dists)
+    by_size = {}
+    for i, dist in enumerate(dists):
+        dist = np.asarray(dist, dtype=np.float64)
+        if len(dist) < 2:
+            tour = np.arange(len(dist), dtype=index_dtype(max(len(dist), 1)))
+            results[i] = GAResult(tour[None, :], np.zeros(1), 0, MaxGenerations.name, tour, 0.0, 0)
+        else:
+            by_size.setdefault(len(dist), []).append(i)
+
+    buckets = []
+    for n_cities, indices in sorted(by_size.items()):
+        per_bucket = max(1, max_bytes // ((n_population + n_parents) * n_cities * 8))
+        for start in range(0, len(indices), per_bucket):
+            chunk = indices[start:start + per_bucket]
+            stacked = np.stack([np.asarray(dists[i], dtype=np.float64) for i in chunk])
+            buckets.append(_Bucket(chunk, stacked, n_population, rng))
+
+    generation = 0
+    while buckets:
+        generation += 1
+        for bucket in buckets:
+            batch_step(bucket, n_parents, mutation_per, crossover_op, mutation_op, rng)
+            best = bucket.lengths.min(axis=1)
+            improved = best < bucket.best_length
+            bucket.best_generation[improved] = generation
+            bucket.best_length = np.minimum(best, bucket.best_length)
+
+            out_of_time = n_generations is not None and generation >= n_generations
+            stalled = generation - bucket.best_generation >= stagnation if stagnation is not None \
+                else np.zeros(len(bucket), dtype=bool)
+            finished = out_of_time | stalled
+            for i in np.flatnonzero(finished):
+                best_row = bucket.lengths[i].argmin()
+                results[bucket.indices[i]] = GAResult(
+                    bucket.population[i], bucket.lengths[i], generation,
+                    MaxGenerations.name if out_of_time else Stagnation.name,
+                    bucket.population[i, best_row].copy(), float(bucket.lengths[i, best_row]),
+                    int(bucket.best_generation[i]))
+            if finished.any():
+                bucket.keep(~finished)
+
+        buckets = [bucket for bucket in buckets if len(bucket)]
+        if callback is not None:
+            callback(GenerationEvent(generation, float(sum(bucket.best_length.sum() for bucket in buckets)), None,
+                                     not buckets))
+    return results
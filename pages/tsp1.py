@@ -1,16 +1,14 @@
-import matplotlib.pyplot as plt
-from itertools import permutations, combinations
-from random import shuffle
-import random
-import numpy as np
-import statistics
-import pandas as pd
-import seaborn as sns
 import streamlit as st
 
-# Title
-st.title("City Coordinates Input")
-st.write("Enter up to 10 cities with their coordinates (x, y) in range 0 - 100.")
+from ga.cache import cached_run_ga, canonical_key, instance_key
+from ga.checkpoint import default_directory
+from ga.encoding import decode_tour
+from ga.instances import city_names, load_instance
+from ga.jobs import DONE, FINISHED, follow, job_columns, job_runner
+from ga.plotting import plot_cities, plot_route
+from ga.profiling import Profiler, streamlit_panel
+from ga.progress import StreamlitProgress
+from ga.spatial import MAX_MATRIX_CITIES
 
 # Define city names with icons
 city_icons = {
@@ -26,332 +24,137 @@ city_icons = {
     "Pulau Pinang": "♝"
 }
 
-# Define empty lists to store city names and coordinates
-cities_names = []
-city_coords = {}
-
-# Create a table-like layout in landscape format
-col1, col2, col3 = st.columns([2, 1, 1])  # Define three columns
-
-# Collect user input in each row
-for i in range(1, 11):
-    # Dropdown to select city name from predefined list
-    city_name = col1.selectbox(
-        f"City {i}",
-        options=[""] + list(city_icons.keys()),  # Empty option for blank selection
-        key=f"city_name_{i}"
-    )
-    
-    # Input fields for x and y coordinates
-    x_coord = col2.number_input(f"x-coordinate (City {i})", min_value=0, max_value=100, step=1, key=f"x_coord_{i}")
-    y_coord = col3.number_input(f"y-coordinate (City {i})", min_value=0, max_value=100, step=1, key=f"y_coord_{i}")
-
-    # Store data if the city name is provided
-    if city_name:
-        cities_names.append(city_name)
-        city_coords[city_name] = (x_coord, y_coord)
-
 # GA Parameters
 n_population = 250
 crossover_per = 0.8
 mutation_per = 0.2
 n_generations = 200
 
-# Define color palette for city markers
-colors = sns.color_palette("pastel", len(cities_names))
-
-# "Submit" button to run the algorithm
-if st.button("Submit"):
-    # Plot initial city locations with connections
-    fig, ax = plt.subplots()
-    for i, (city, (city_x, city_y)) in enumerate(city_coords.items()):
-        color = colors[i]
-        ax.scatter(city_x, city_y, c=[color], s=1200, zorder=2)
-        
-        # Display icon with city name on the plot
-        city_icon = city_icons.get(city, "")
-        ax.annotate(f"{city_icon} {city}", (city_x, city_y), fontsize=12, ha='center', va='bottom')
-
-        # Draw faint lines between each pair of cities
-        for j, (other_city, (other_x, other_y)) in enumerate(city_coords.items()):
-            if i != j:
-                ax.plot([city_x, other_x], [city_y, other_y], color='gray', linestyle='-', linewidth=1, alpha=0.1)
-
-    
-
-fig, ax = plt.subplots()
-
-ax.grid(False)  # Grid
-
-for i, (city, (city_x, city_y)) in enumerate(city_coords.items()):
-    color = colors[i]
-    icon = city_icons[city]
-    ax.scatter(city_x, city_y, c=[color], s=1200, zorder=2)
-    ax.annotate(icon, (city_x, city_y), fontsize=40, ha='center', va='center', zorder=3)
-    ax.annotate(city, (city_x, city_y), fontsize=12, ha='center', va='bottom', xytext=(0, -30),
-                textcoords='offset points')
-
-    # Connect cities with opaque lines
-    for j, (other_city, (other_x, other_y)) in enumerate(city_coords.items()):
-        if i != j:
-            ax.plot([city_x, other_x], [city_y, other_y], color='gray', linestyle='-', linewidth=1, alpha=0.1)
-
-fig.set_size_inches(16, 12)
-st.pyplot(fig)
-
-#population
-def initial_population(cities_list, n_population = 250):
-
-    """
-    Generating initial population of cities randomly selected from the all possible permutations
-    of the given cities.
-    Input:
-    1- Cities list
-    2- Number of population
-    Output:
-    Generated lists of cities
-    """
-
-    population_perms = []
-    possible_perms = list(permutations(cities_list))
-    random_ids = random.sample(range(0,len(possible_perms)),n_population)
+# Above MAX_MATRIX_CITIES the GA computes distances on demand and moves between
+# nearest neighbours; the cap keeps a page run responsive
+MAX_UPLOAD_CITIES = 20000
 
-    for i in random_ids:
-        population_perms.append(list(possible_perms[i]))
 
-    return population_perms
-
-#distance between two cities
-
-def dist_two_cities(city_1, city_2):
-
-    city_1_coords = city_coords[city_1]
-    city_2_coords = city_coords[city_2]
-    return np.sqrt(np.sum((np.array(city_1_coords) - np.array(city_2_coords))**2))
-
-def total_dist_individual(individual):
-
-    total_dist = 0
-    for i in range(0, len(individual)):
-        if(i == len(individual) - 1):
-            total_dist += dist_two_cities(individual[i], individual[0])
-        else:
-            total_dist += dist_two_cities(individual[i], individual[i+1])
-    return total_dist
-
-#fitness probablity function
-
-def fitness_prob(population):
+def city_inputs():
     """
-    Calculating the fitness probability
-    Input:
-    1- Population
+    Collecting up to 10 cities and their coordinates from the form.
     Output:
-    Population fitness probability
+    Dict of city name to (x, y)
     """
-    total_dist_all_individuals = []
-    for i in range(0, len(population)):
-        total_dist_all_individuals.append(total_dist_individual(population[i]))
+    city_coords = {}
 
-    max_population_cost = max(total_dist_all_individuals)
-    population_fitness = max_population_cost - total_dist_all_individuals
-    population_fitness_sum = sum(population_fitness)
-    population_fitness_probs = population_fitness / population_fitness_sum
-    return population_fitness_probs
+    # Create a table-like layout in landscape format
+    col1, col2, col3 = st.columns([2, 1, 1])  # Define three columns
 
-#roulette wheel
+    # Collect user input in each row
+    for i in range(1, 11):
+        # Dropdown to select city name from predefined list
+        city_name = col1.selectbox(
+            f"City {i}",
+            options=[""] + list(city_icons.keys()),  # Empty option for blank selection
+            key=f"city_name_{i}"
+        )
 
-def roulette_wheel(population, fitness_probs):
-    """
-    Implement selection strategy based on roulette wheel proportionate selection.
-    Input:
-    1- population
-    2- fitness probabilities
-    Output:
-    selected individual
-    """
-    population_fitness_probs_cumsum = fitness_probs.cumsum()
-    bool_prob_array = population_fitness_probs_cumsum < np.random.uniform(0,1,1)
-    selected_individual_index = len(bool_prob_array[bool_prob_array == True]) - 1
-    return population[selected_individual_index]
+        # Input fields for x and y coordinates
+        x_coord = col2.number_input(f"x-coordinate (City {i})", min_value=0, max_value=100, step=1, key=f"x_coord_{i}")
+        y_coord = col3.number_input(f"y-coordinate (City {i})", min_value=0, max_value=100, step=1, key=f"y_coord_{i}")
 
-#crossover
-
-def crossover(parent_1, parent_2):
-    """
-    Implement mating strategy using simple crossover between 2 parents
-    Input:
-    1- parent 1
-    2- parent 2
-    Output:
-    1- offspring 1
-    2- offspring 2
-    """
-    n_cities_cut = len(cities_names) - 1
-    cut = round(random.uniform(1, n_cities_cut))
-    offspring_1 = []
-    offspring_2 = []
-
-    offspring_1 = parent_1[0:cut]
-    offspring_1 += [city for city in parent_2 if city not in offspring_1]
+        # Store data if the city name is provided
+        if city_name:
+            city_coords[city_name] = (x_coord, y_coord)
 
+    return city_coords
 
-    offspring_2 = parent_2[0:cut]
-    offspring_2 += [city for city in parent_1 if city not in offspring_2]
 
-
-    return offspring_1, offspring_2
-
-#mutation
-
-def mutation(offspring):
+def uploaded_cities(uploaded):
     """
-    Implement mutation strategy in a single offspring
-    Input:
-    1- offspring individual
+    Reading the cities of an uploaded TSPLIB, CSV or .npy file.
     Output:
-    1- mutated offspring individual
+    Dict of city name to (x, y), empty when the file cannot be used
     """
-    n_cities_cut = len(cities_names) - 1
-    index_1 = round(random.uniform(0,n_cities_cut))
-    index_2 = round(random.uniform(0,n_cities_cut))
-
-    temp = offspring[index_1]
-    offspring[index_1] = offspring[index_2]
-    offspring[index_2] = temp
-    return(offspring)
+    try:
+        instance = load_instance(uploaded)
+    except ValueError as error:
+        st.write(f"Cannot read {uploaded.name}: {error}")
+        return {}
+    if instance.coords is None:
+        st.write("The file has no city coordinates, only a distance matrix.")
+        return {}
+    if len(instance.coords) > MAX_UPLOAD_CITIES:
+        st.write(f"The file has {len(instance.coords)} cities, at most {MAX_UPLOAD_CITIES} are supported here.")
+        return {}
+    return dict(zip(city_names(instance), map(tuple, instance.coords.tolist())))
+
+
+def main():
+    # Title
+    st.title("City Coordinates Input")
+    st.write("Enter up to 10 cities with their coordinates (x, y) in range 0 - 100, "
+             "or load them from a file.")
+
+    uploaded = st.file_uploader("TSPLIB .tsp, CSV with x and y columns, or .npy coordinates",
+                                type=["tsp", "csv", "txt", "npy"])
+    city_coords = city_inputs() if uploaded is None else uploaded_cities(uploaded)
+    cities_names = list(city_coords)
+
+    # The run goes to the shared background pool; its job id is kept in the
+    # session with the request it answers, so reruns keep following it while
+    # the cities stay the same. Sessions share the run of an identical request,
+    # a profiled run is this session's own
+    coords = list(city_coords.values())
+    params = dict(n_population=n_population, n_generations=n_generations,
+                  crossover_per=crossover_per, mutation_per=mutation_per,
+                  neighbour_moves=len(coords) > MAX_MATRIX_CITIES)
+    key = canonical_key("tsp", instance_key(coords), params) if coords else None
+
+    profile = st.sidebar.checkbox("Profile generations")
+    job_key, job_id = st.session_state.get("tsp1_job", (None, None))
+    status = job_runner.status(job_id)
+    running = job_key == key and status is not None and status.state not in FINISHED
+    # "Submit" button to run the algorithm, following the running request again
+    if st.button("Submit") and not running:
+        if len(cities_names) < 2:
+            st.write("Select at least two cities.")
+            return
+        # Runs and distances are cached per city set, so repeating a request is instant;
+        # runs are checkpointed, so a cancelled run continues where it stopped
+        profiler = Profiler() if profile else None
+        st.session_state["tsp1_profiler"] = profiler
+        shared = None if profiler is not None else key
+        st.session_state["tsp1_job"] = (key, job_runner.submit(cached_run_ga, coords, key=shared, profiler=profiler,
+                                                               checkpoint_dir=default_directory(), **params))
+    job_key, job_id = st.session_state.get("tsp1_job", (None, None))
+    if job_id is None or job_key != key:
+        return
+    if st.button("Cancel") and not job_runner.cancel(job_id):
+        # other sessions still follow the run, this one stops following it
+        del st.session_state["tsp1_job"]
+        st.write("The run stopped for this session.")
+        return
 
-def run_ga(cities_names, n_population, n_generations, crossover_per, mutation_per):
-
-    population = initial_population(cities_names, n_population)
-    fitness_probs = fitness_prob(population)
-
-    parents_list = []
-    for i in range(0, int(crossover_per * n_population)):
-        parents_list.append(roulette_wheel(population, fitness_probs))
-
-    offspring_list = []
-    for i in range(0,len(parents_list), 2):
-        offspring_1, offspring_2 = crossover(parents_list[i], parents_list[i+1])
-
-    #     print(offspring_1)
-    #     print(offspring_2)
-    #     print()
-
-        mutate_threashold = random.random()
-        if(mutate_threashold > (1-mutation_per)):
-            offspring_1 = mutation(offspring_1)
-    #         print("Offspring 1 mutated", offspring_1)
-
-        mutate_threashold = random.random()
-        if(mutate_threashold > (1-mutation_per)):
-            offspring_2 = mutation(offspring_2)
-    #         print("Offspring 2 mutated", offspring_2)
-
-
-        offspring_list.append(offspring_1)
-        offspring_list.append(offspring_2)
-
-    mixed_offspring = parents_list + offspring_list
-
-    fitness_probs = fitness_prob(mixed_offspring)
-    sorted_fitness_indices = np.argsort(fitness_probs)[::-1]
-    best_fitness_indices = sorted_fitness_indices[0:n_population]
-    best_mixed_offspring = []
-    for i in best_fitness_indices:
-        best_mixed_offspring.append(mixed_offspring[i])
-
-
-
-    for i in range(0, n_generations):
-        # if (i%10 == 0):
-            # print("Generation: ", i)
-
-        fitness_probs = fitness_prob(best_mixed_offspring)
-        parents_list = []
-        for i in range(0, int(crossover_per * n_population)):
-            parents_list.append(roulette_wheel(best_mixed_offspring, fitness_probs))
-
-        offspring_list = []
-        for i in range(0,len(parents_list), 2):
-            offspring_1, offspring_2 = crossover(parents_list[i], parents_list[i+1])
-
-            mutate_threashold = random.random()
-            if(mutate_threashold > (1-mutation_per)):
-                offspring_1 = mutation(offspring_1)
-
-            mutate_threashold = random.random()
-            if(mutate_threashold > (1-mutation_per)):
-                offspring_2 = mutation(offspring_2)
-
-            offspring_list.append(offspring_1)
-            offspring_list.append(offspring_2)
-
-
-        mixed_offspring = parents_list + offspring_list
-        fitness_probs = fitness_prob(mixed_offspring)
-        sorted_fitness_indices = np.argsort(fitness_probs)[::-1]
-        best_fitness_indices = sorted_fitness_indices[0:int(0.8*n_population)]
-
-        best_mixed_offspring = []
-        for i in best_fitness_indices:
-            best_mixed_offspring.append(mixed_offspring[i])
-
-        old_population_indices = [random.randint(0, (n_population - 1)) for j in range(int(0.2*n_population))]
-        for i in old_population_indices:
-#             print(i)
-            best_mixed_offspring.append(population[i])
-
-        random.shuffle(best_mixed_offspring)
-
-    return best_mixed_offspring
-
-best_mixed_offspring = run_ga(cities_names, n_population, n_generations, crossover_per, mutation_per)
-
-total_dist_all_individuals = []
-for i in range(0, n_population):
-    total_dist_all_individuals.append(total_dist_individual(best_mixed_offspring[i]))
-
-index_minimum = np.argmin(total_dist_all_individuals)
-
-minimum_distance = min(total_dist_all_individuals)
-minimum_distance
-
-#shortest path
-# shortest_path = offspring_list[index_minimum]
-shortest_path = best_mixed_offspring[index_minimum]
-st.write(shortest_path)
-
-x_shortest = []
-y_shortest = []
-for city in shortest_path:
-    x_value, y_value = city_coords[city]
-    x_shortest.append(x_value)
-    y_shortest.append(y_value)
-
-x_shortest.append(x_shortest[0])
-y_shortest.append(y_shortest[0])
-
-fig, ax = plt.subplots()
-ax.plot(x_shortest, y_shortest, '--go', label='Best Route', linewidth=2.5)
-plt.legend()
-
-for i in range(len(x_shortest)):
-    for j in range(i + 1, len(x_shortest)):
-        ax.plot([x_shortest[i], x_shortest[j]], [y_shortest[i], y_shortest[j]], 'k-', alpha=0.09, linewidth=1)
-
-plt.title(label="TSP Best Route Using GA",
-          fontsize=25,
-          color="k")
-
-str_params = '\n'+str(n_generations)+' Generations\n'+str(n_population)+' Population Size\n'+str(crossover_per)+' Crossover\n'+str(mutation_per)+' Mutation'
-plt.suptitle("Total Distance Travelled: "+
-             str(round(minimum_distance, 3)) +
-             str_params, fontsize=18, y = 1.047)
-
-for i, txt in enumerate(shortest_path):
-    ax.annotate(str(i+1)+ "- " + txt, (x_shortest[i], y_shortest[i]), fontsize= 20)
-
-fig.set_size_inches(16, 12)
-# plt.grid(color='k', linestyle='dotted')
-st.pyplot(fig)
+    # Plot initial city locations with connections
+    st.pyplot(plot_cities(city_coords, city_icons))
+
+    progress = StreamlitProgress(label="Distance", columns=job_columns(job_id))
+    status = follow(job_id, progress)
+    if status is None:
+        st.write("The run is no longer available, submit it again.")
+        return
+    if status.state != DONE:
+        st.write("The run stopped: " + str(status.error or status.state))
+        return
+    result = status.result
+    if st.session_state.get("tsp1_profiler") is not None:
+        streamlit_panel(st.session_state["tsp1_profiler"])
+    minimum_distance = result.best_length
+
+    #shortest path
+    shortest_path = decode_tour(result.best_tour, cities_names)
+    st.write(shortest_path)
+
+    st.pyplot(plot_route(shortest_path, city_coords, minimum_distance,
+                         n_generations, n_population, crossover_per, mutation_per, city_icons))
+
+
+if __name__ == "__main__":
+    main()
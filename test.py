@@ -4,11 +4,12 @@ st.set_page_config(
 )
 st.header("Genetic Algorithm", divider="gray")
 
-import random
-
-#POP_SIZE: Number of Chromosomes in our list.
-POP_SIZE = 500
-
+from ga.cache import cached_string_ga, canonical_key
+from ga.checkpoint import default_directory
+from ga.jobs import DONE, FINISHED, follow, job_columns, job_runner
+from ga.profiling import Profiler, streamlit_panel
+from ga.progress import GenerationEvent, StreamlitProgress
+from ga.strings import GENES, POP_SIZE, run_batch
 
 #TARGET: Our goal.
 TARGET = st.text_input("Enter your name")
@@ -16,124 +17,85 @@ TARGET = st.text_input("Enter your name")
 #MUT_RATE: Rate at which our string will be changed.
 #MUT_RATE = 0.2
 MUT_RATE = st.number_input("Enter your mutation rate")
-#GENES: Options from which our population would be created.
-GENES = ' abcdefghijklmnopqrstuvwxyz'
-
-#initialization
-
-def initialize_pop(TARGET):
-  population = list()
-  tar_len = len(TARGET)
-
-  for i in range(POP_SIZE):
-      temp = list()
-      for j in range(tar_len):
-          temp.append(random.choice(GENES))
-      population.append(temp)
-
-  return population
-
-#fitness calculation
-#0 fitness means target found
-
-def fitness_cal(TARGET, chromo_from_pop):
-  difference = 0
-  for tar_char, chromo_char in zip(TARGET, chromo_from_pop):
-      if tar_char != chromo_char:
-          difference+=1
-  return [chromo_from_pop, difference]
-
-#selection
-#returns top 50% population sorted according to fitness
-
-def selection(population, TARGET):
-  sorted_chromo_pop = sorted(population, key= lambda x: x[1])
-  return sorted_chromo_pop[:int(0.5*POP_SIZE)]
-
-#crossover
-
-def crossover(selected_chromo, CHROMO_LEN, population):
-  offspring_cross = []
-  for i in range(int(POP_SIZE)):
-    parent1 = random.choice(selected_chromo)
-    parent2 = random.choice(population[:int(POP_SIZE*50)])
-
-    p1 = parent1[0]
-    p2 = parent2[0]
-
-    crossover_point = random.randint(1, CHROMO_LEN-1)
-    child =  p1[:crossover_point] + p2[crossover_point:]
-    offspring_cross.extend([child])
-  return offspring_cross
 
-#mutation
+def describe(event):
+  text = 'String: ' + str(event.best) + ' Generation: ' + str(event.generation) + ' Fitness: ' + str(event.fitness)
+  if (event.fitness == 0):
+    return 'Target found  \n' + text
+  return text
 
-def mutate(offspring, MUT_RATE):
-  mutated_offspring = []
-
-  for arr in offspring:
-      for i in range(len(arr)):
-          if random.random() < MUT_RATE:
-              arr[i] = random.choice(GENES)
-      mutated_offspring.append(arr)
-  return mutated_offspring
-
-#replacement
-
-def replace(new_gen, population):
-  for _ in range(len(population)):
-      if population[_][1] > new_gen[_][1]:
-        population[_][0] = new_gen[_][0]
-        population[_][1] = new_gen[_][1]
-  return population
+def request_key(POP_SIZE, MUT_RATE, TARGET, GENES):
+  return canonical_key("strings", TARGET, dict(POP_SIZE=POP_SIZE, MUT_RATE=MUT_RATE, GENES=GENES))
 
 #main
 
-def main(POP_SIZE, MUT_RATE, TARGET, GENES):
-    # 1) initialize population
-    initial_population = initialize_pop(TARGET)
-    found = False
-    population = []
-    generation = 1
-
-    # 2) Calculating the fitness for the current population
-    for _ in range(len(initial_population)):
-        population.append(fitness_cal(TARGET, initial_population[_]))
-
-    # now population has 2 things, [chromosome, fitness]
-    # 3) now we loop until TARGET is found
-    while not found:
-
-      # 3.1) select best people from current population
-      selected = selection(population, TARGET)
-
-      # 3.2) mate parents to make new generation
-      population = sorted(population, key= lambda x:x[1])
-      crossovered = crossover(selected, len(TARGET), population)
-
-      # 3.3) mutating the children to diversify the new generation
-      mutated = mutate(crossovered, MUT_RATE)
-
-      new_gen = []
-      for _ in mutated:
-          new_gen.append(fitness_cal(TARGET, _))
-
-      # 3.4) replacement of bad population with new generation
-      # we sort here first to compare the least fit population with the most fit new_gen
-
-      population = replace(new_gen, population)
-
-
-      if (population[0][1] == 0):
-        st.write('Target found')
-        st.write('String: ' + str(population[0][0]) + ' Generation: ' + str(generation) + ' Fitness: ' + str(population[0][1]))
-        break
-      st.write('String: ' + str(population[0][0]) + ' Generation: ' + str(generation) + ' Fitness: ' + str(population[0][1]))
-      generation+=1
+def main(POP_SIZE, MUT_RATE, TARGET, GENES, profile=False):
+    # the run goes to the shared background pool and returns at once; the job id
+    # is kept in the session so reruns follow it. Checkpointed, so a cancelled
+    # run continues where it stopped. Sessions share the run of an identical
+    # request, a profiled run is this session's own
+    key = request_key(POP_SIZE, MUT_RATE, TARGET, GENES)
+    job_key, job_id = st.session_state.get("strings_job", (None, None))
+    status = job_runner.status(job_id)
+    if job_key == key and status is not None and status.state not in FINISHED:
+      return job_id
+    profiler = Profiler() if profile else None
+    st.session_state["strings_profiler"] = profiler
+    job_id = job_runner.submit(cached_string_ga, TARGET, key=None if profiler is not None else key, POP_SIZE=POP_SIZE,
+                               MUT_RATE=MUT_RATE, GENES=GENES, checkpoint_dir=default_directory(), profiler=profiler)
+    st.session_state["strings_job"] = (key, job_id)
+    return job_id
+
+def show(POP_SIZE, MUT_RATE, TARGET, GENES):
+    job_key, job_id = st.session_state.get("strings_job", (None, None))
+    if job_id is None or job_key != request_key(POP_SIZE, MUT_RATE, TARGET, GENES):
+      return None
+    if st.button("Cancel") and not job_runner.cancel(job_id):
+      # other sessions still follow the run, this one stops following it
+      del st.session_state["strings_job"]
+      st.write('The run stopped for this session.')
+      return None
+    # progress is redrawn in place a few times per second, not once per generation
+    progress = StreamlitProgress(label="Fitness", describe=describe, columns=job_columns(job_id))
+    status = follow(job_id, progress)
+    if status is None or status.state != DONE:
+      st.write('The run stopped: ' + (str(status.error or status.state) if status is not None else 'not found'))
+      return None
+    result = status.result
+    if not progress.history.records:
+        # cached result, the GA did not run
+        progress(GenerationEvent(result.generation, result.fitness, result.chromosome, True))
+    if (result.fitness != 0):
+      st.write('Stopped without finding the target: ' + result.stop_reason)
+    if st.session_state.get("strings_profiler") is not None:
+      streamlit_panel(st.session_state["strings_profiler"])
+    return result
+
+def show_batch(POP_SIZE, MUT_RATE, GENES):
+    # many targets evolve together in one vectorized run, in the background too
+    with st.expander("Many targets"):
+      targets = [line for line in st.text_area("One target per line").splitlines() if line]
+      if st.button("Calculate all") and targets:
+        st.session_state["batch_job"] = (targets, job_runner.submit(run_batch, targets, POP_SIZE=POP_SIZE,
+                                                                    MUT_RATE=MUT_RATE, GENES=GENES))
+      targets, job_id = st.session_state.get("batch_job", (None, None))
+      if job_id is None:
+        return None
+      progress = StreamlitProgress(label="Fitness left", describe=lambda event: 'Generation: ' + str(event.generation)
+                                   + ' Targets left: ' + str(event.active), columns=job_columns(job_id))
+      status = follow(job_id, progress)
+      if status is None or status.state != DONE:
+        st.write('The run stopped: ' + (str(status.error or status.state) if status is not None else 'not found'))
+        return None
+      st.table({"Target": targets, "Best": [result.chromosome for result in status.result],
+                "Generation": [result.generation for result in status.result],
+                "Fitness": [result.fitness for result in status.result]})
+      return status.result
 
 #result = main(POP_SIZE, MUT_RATE, TARGET, GENES)
 # Insert button to calculate
+profile = st.sidebar.checkbox("Profile generations")
 if st.button("Calculate"):
-    main(POP_SIZE, MUT_RATE, TARGET, GENES)
-   
-
+    main(POP_SIZE, MUT_RATE, TARGET, GENES, profile)
+show(POP_SIZE, MUT_RATE, TARGET, GENES)
+show_batch(POP_SIZE, MUT_RATE, GENES)
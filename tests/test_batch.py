@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+from ga import strings
+from ga.termination import MaxGenerations, Stagnation, TargetFitness
+
+#targets of different lengths share padded buckets in batch mode; the padding
+#must never count towards fitness, and every target stops on its own
+
+
+def test_batch_fitness_ignores_padding():
+    rng = np.random.default_rng(0)
+    targets = ["hello", "GA", "padding!"]
+    length = strings.bucket_length(max(map(len, targets)))
+    target_codes = np.zeros((len(targets), length), dtype=np.uint8)
+    valid = np.zeros((len(targets), length), dtype=bool)
+    for i, target in enumerate(targets):
+        target_codes[i, :len(target)] = strings.encode(target, strings.GENES)
+        valid[i, :len(target)] = True
+    population = rng.integers(0, len(strings.GENES), (len(targets), 30, length), dtype=np.uint8)
+
+    fitness = strings.batch_fitness(target_codes, valid, population)
+    scratch = np.empty(population.shape, dtype=bool)
+    buffered = strings.batch_fitness(target_codes, valid, population.reshape(-1, length),
+                                     np.empty((len(targets), 30), dtype=np.int64), scratch)
+    for i, target in enumerate(targets):
+        expected = strings.fitness_cal(strings.encode(target, strings.GENES), population[i, :, :len(target)])
+        np.testing.assert_array_equal(fitness[i], expected)
+        np.testing.assert_array_equal(buffered[i], expected)
+
+
+@pytest.mark.parametrize("max_bytes", [2**18, 1])
+def test_targets_finish_independently(max_bytes):
+    # 'ab' and 'genetic' share a merged bucket, max_bytes=1 gives every target its own
+    targets = ["ab", "genetic", "", "a longer target string"]
+    results = strings.run_batch(targets, seed=1, max_generations=5000, max_bytes=max_bytes)
+    assert [result.chromosome for result in results] == targets
+    assert {result.stop_reason for result in results} == {TargetFitness.name}
+    assert results[2].generation == 0
+    # shorter targets are found first and stop there
+    assert results[0].generation < results[1].generation < results[3].generation
+
+
+def test_unfound_targets_stop_with_their_own_reason():
+    targets = ["hi", "x" * 60, "hello world"]
+    results = strings.run_batch(targets, seed=2, max_generations=40, stagnation=None)
+    assert results[0].stop_reason == TargetFitness.name and results[0].generation < 40
+    assert (results[1].stop_reason, results[1].generation) == (MaxGenerations.name, 40)
+    for target, result in zip(targets, results):
+        # the reported fitness is the distance of the unpadded chromosome
+        assert len(result.chromosome) == len(target)
+        assert result.fitness == sum(a != b for a, b in zip(result.chromosome, target))
+
+
+def test_stagnating_target_stops_alone():
+    # without mutation a target missing a gene can never be found
+    results = strings.run_batch(["aa", "abcdefgh" * 4], MUT_RATE=0.0, seed=3, stagnation=20, max_generations=5000)
+    assert results[0].stop_reason == TargetFitness.name
+    assert results[1].stop_reason == Stagnation.name
+    assert results[1].fitness > 0 and results[0].generation < results[1].generation < 5000
@@ -0,0 +1,58 @@
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ga.cache import canonical_key, instance_key
+from ga.termination import Stagnation
+
+#cached runs and shared jobs are found again by their key, so equal requests
+#must hash alike in every process and different ones must not
+
+
+def test_key_is_stable_across_processes():
+    code = ("from ga.cache import canonical_key; import numpy as np; "
+            "print(canonical_key('tsp', np.arange(6.0).reshape(3, 2), {'b': 1, 'a': [0.5, None, 'x']}))")
+    keys = {subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                           cwd=Path(__file__).parents[1]).stdout.strip()
+            for _ in range(2)}
+    assert keys == {canonical_key("tsp", np.arange(6.0).reshape(3, 2), {"b": 1, "a": [0.5, None, "x"]})}
+
+
+def test_dict_order_does_not_matter():
+    assert canonical_key({"a": 1, "b": 2.0}) == canonical_key({"b": 2.0, "a": 1})
+
+
+def test_numpy_scalars_hash_like_python_numbers():
+    assert canonical_key(np.float64(0.2), np.int64(3)) == canonical_key(0.2, 3)
+
+
+@pytest.mark.parametrize("other", [np.arange(6, dtype=np.int64), np.arange(6.0).reshape(2, 3), (0, 1, 2, 3, 4, 5),
+                                   [0.0, 1.0, 2.0, 3.0, 4.0, 5.0]])
+def test_arrays_differ_by_dtype_shape_and_container(other):
+    assert canonical_key(np.arange(6.0)) != canonical_key(other)
+
+
+def test_nesting_is_part_of_the_key():
+    assert canonical_key([1, [2, 3]]) != canonical_key([[1, 2], 3])
+    assert canonical_key("a", "b") != canonical_key("ab")
+
+
+def test_policies_hash_by_settings_not_counters():
+    used = Stagnation(50)
+    used.check(1, 10.0, None)
+    assert canonical_key(used) == canonical_key(Stagnation(50))
+    assert canonical_key(Stagnation(50)) != canonical_key(Stagnation(60))
+
+
+def test_unhashable_parts_raise():
+    with pytest.raises(TypeError):
+        canonical_key(object())
+
+
+def test_instance_key_ignores_how_coordinates_are_passed():
+    coords = [(0, 1), (2.5, 3), (4, 5)]
+    assert instance_key(coords) == instance_key(np.array(coords, dtype=np.float32)) == instance_key(tuple(coords))
+    assert instance_key(coords) != instance_key(coords[::-1])
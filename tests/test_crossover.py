@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+from ga.crossover import CROSSOVERS, crossover_batch, edge_recombination, partially_mapped_crossover
+from ga.distance import distance_matrix
+from ga.local_search import neighbour_lists
+from ga.population import random_population
+
+#every operator must hand back a permutation of the cities, whatever the
+#parents; a repeated or missing city would corrupt every later length
+
+
+def assert_permutations(children):
+    n_cities = children.shape[1]
+    np.testing.assert_array_equal(np.sort(children, axis=1), np.broadcast_to(np.arange(n_cities), children.shape))
+
+
+@pytest.fixture
+def parents():
+    rng = np.random.default_rng(0)
+    return random_population(50, 64, rng=rng), random_population(50, 64, rng=rng)
+
+
+def test_pmx_children_are_permutations(parents):
+    rng = np.random.default_rng(1)
+    children = np.array([partially_mapped_crossover(p1, p2, rng) for p1, p2 in zip(*parents)])
+    assert_permutations(children)
+
+
+def test_pmx_keeps_a_slice_of_parent_1():
+    parent_1, parent_2 = np.arange(10), np.arange(10)[::-1].copy()
+    child = partially_mapped_crossover(parent_1, parent_2, np.random.default_rng(2))
+    assert (child == parent_1).any()
+    assert_permutations(child[None])
+
+
+@pytest.mark.parametrize("with_neighbours", [False, True])
+def test_erx_children_are_permutations(parents, with_neighbours):
+    neighbours = None
+    if with_neighbours:
+        neighbours = neighbour_lists(distance_matrix(np.random.default_rng(3).random((50, 2))), 5)
+    rng = np.random.default_rng(4)
+    children = np.array([edge_recombination(p1, p2, rng, neighbours) for p1, p2 in zip(*parents)])
+    assert_permutations(children)
+
+
+def test_erx_of_identical_parents_is_the_parent():
+    parent = random_population(30, 1, rng=np.random.default_rng(5))[0]
+    child = edge_recombination(parent, parent, np.random.default_rng(6))
+    # the child starts where the parent does and only has the parent's edges
+    assert child[0] == parent[0]
+    edges = {frozenset((a, b)) for a, b in zip(parent.tolist(), np.roll(parent, -1).tolist())}
+    assert {frozenset((a, b)) for a, b in zip(child.tolist(), np.roll(child, -1).tolist())} == edges
+
+
+@pytest.mark.parametrize("operator", sorted(CROSSOVERS))
+def test_crossover_batch_children_are_permutations(parents, operator):
+    assert_permutations(crossover_batch(*parents, operator, np.random.default_rng(7)))
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+
+from ga import strings
+from ga.distance import distance_matrix, fitness_probabilities, tour_length, tour_lengths
+from ga.local_search import improve_tour, neighbour_lists
+from ga.mutation import MUTATIONS, mutate
+from ga.population import random_population
+from ga.spatial import DistanceOracle
+from ga.tsp import batch_roulette, run_ga
+
+#the engine trusts incremental length updates and saved RNG state instead of
+#recomputing them, so these check the shortcuts against the slow way
+
+
+@pytest.fixture
+def instance():
+    rng = np.random.default_rng(0)
+    coords = rng.random((60, 2))
+    return coords, distance_matrix(coords), random_population(60, 200, rng=rng)
+
+
+@pytest.mark.parametrize("operator", sorted(MUTATIONS))
+def test_mutation_deltas(instance, operator):
+    _, dist, population = instance
+    lengths = tour_lengths(population, dist)
+    rows = np.arange(0, len(population), 2)
+    lengths[rows] += mutate(population, rows, operator, np.random.default_rng(1), dist)
+    np.testing.assert_allclose(lengths, tour_lengths(population, dist), rtol=0, atol=1e-9)
+
+
+def test_neighbour_mutation_deltas(instance):
+    _, dist, population = instance
+    lengths = tour_lengths(population, dist)
+    rows = np.arange(len(population))
+    lengths += mutate(population, rows, rng=np.random.default_rng(2), dist=dist, neighbours=neighbour_lists(dist, 5))
+    np.testing.assert_allclose(lengths, tour_lengths(population, dist), rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("or_opt", [False, True])
+def test_local_search_delta(instance, or_opt):
+    coords, dist, population = instance
+    for distances in (dist, DistanceOracle(coords)):
+        tour = population[0].copy()
+        before = tour_length(tour, dist)
+        delta = improve_tour(tour, distances, neighbour_lists(dist, 8), or_opt=or_opt)
+        assert delta < 0
+        assert sorted(tour.tolist()) == list(range(len(tour)))
+        assert before + delta == pytest.approx(tour_length(tour, dist), abs=1e-9)
+
+
+def test_batch_roulette_matches_per_instance_wheels():
+    lengths = np.random.default_rng(3).random((5, 40)) * 10
+    lengths[2] = 4.0  # equal lengths give a uniform wheel
+    chosen = batch_roulette(lengths, 300, np.random.default_rng(4))
+    draws = np.random.default_rng(4).random((5, 300))
+    for i in range(5):
+        cumulative = np.cumsum(fitness_probabilities(lengths[i]))
+        cumulative[-1] = 1.0
+        expected = np.minimum(np.searchsorted(cumulative, draws[i], side="right"), 39)
+        np.testing.assert_array_equal(chosen[i], expected)
+
+
+def test_verified_lengths_stay_exact(instance):
+    _, dist, _ = instance
+    result = run_ga(dist, n_population=50, n_generations=40, memetic=True, mutation_op="two_opt", seed=5)
+    np.testing.assert_allclose(result.lengths, tour_lengths(result.population, dist), rtol=0, atol=1e-9)
+
+
+def test_tsp_resume_matches_uninterrupted_run(instance, tmp_path):
+    _, dist, _ = instance
+    params = dict(n_population=40, crossover_op="ox", mutation_op="insertion", seed=6)
+    whole = run_ga(dist, n_generations=30, **params)
+    path = str(tmp_path / "tsp.npz")
+    run_ga(dist, n_generations=12, checkpoint=path, **params)
+    resumed = run_ga(dist, n_generations=30, resume_from=path, **params)
+    np.testing.assert_array_equal(resumed.population, whole.population)
+    np.testing.assert_array_equal(resumed.lengths, whole.lengths)
+    assert (resumed.best_length, resumed.best_generation) == (whole.best_length, whole.best_generation)
+
+
+def test_string_resume_matches_uninterrupted_run(tmp_path):
+    whole = strings.run_ga("resume me exactly", POP_SIZE=100, seed=7, max_generations=60)
+    path = str(tmp_path / "strings.npz")
+    strings.run_ga("resume me exactly", POP_SIZE=100, seed=7, max_generations=25, checkpoint=path)
+    resumed = strings.run_ga("resume me exactly", POP_SIZE=100, seed=7, max_generations=60, resume_from=path)
+    assert resumed == whole
@@ -0,0 +1,86 @@
+import io
+
+import numpy as np
+import pytest
+
+from ga.instances import city_names, instance_distances, load_instance, read_csv, read_tsplib
+
+#explicit TSPLIB weights are spread over lines in no fixed layout, and CSV
+#files come with or without a header, so each reader is checked on a small
+#instance whose matrix is known
+
+#symmetric 4 city matrix used by every explicit format below
+MATRIX = np.array([[0, 3, 5, 9],
+                   [3, 0, 4, 7],
+                   [5, 4, 0, 2],
+                   [9, 7, 2, 0]], dtype=np.float64)
+
+
+def tsplib(weight_format, section):
+    return io.StringIO(f"NAME: four\nTYPE: TSP\nDIMENSION: 4\nEDGE_WEIGHT_TYPE: EXPLICIT\n"
+                       f"EDGE_WEIGHT_FORMAT: {weight_format}\nEDGE_WEIGHT_SECTION\n{section}\nEOF\n")
+
+
+@pytest.mark.parametrize("weight_format, section", [
+    ("LOWER_DIAG_ROW", "0\n3 0\n5 4 0\n9 7 2 0"),
+    # the numbers of one row may wrap onto the next line
+    ("LOWER_DIAG_ROW", "0 3 0 5\n4 0 9 7 2\n0"),
+    ("UPPER_ROW", "3 5 9\n4 7\n2"),
+    ("UPPER_ROW", "3 5 9 4 7 2"),
+    ("FULL_MATRIX", "0 3 5 9\n3 0 4 7\n5 4 0 2\n9 7 2 0"),
+])
+def test_explicit_weight_formats(weight_format, section):
+    instance = read_tsplib(tsplib(weight_format, section))
+    assert instance.name == "four" and instance.coords is None
+    np.testing.assert_array_equal(instance.dist, MATRIX)
+    np.testing.assert_array_equal(instance_distances(instance), MATRIX)
+    assert city_names(instance) == ["1", "2", "3", "4"]
+
+
+def test_short_weight_section_raises():
+    truncated = tsplib("UPPER_ROW", "3 5 9\n4").getvalue().replace("EOF\n", "")
+    with pytest.raises(ValueError, match="expected 6 numbers"):
+        read_tsplib(io.StringIO(truncated))
+
+
+def test_unknown_weight_format_raises():
+    with pytest.raises(ValueError, match="EDGE_WEIGHT_FORMAT"):
+        read_tsplib(tsplib("UPPER_COL", "3 5 9 4 7 2"))
+
+
+def test_euc_2d_coordinates_are_rounded():
+    instance = read_tsplib(io.StringIO("NAME: two\nDIMENSION: 2\nEDGE_WEIGHT_TYPE: EUC_2D\n"
+                                       "NODE_COORD_SECTION\n1 0 0\n2 2.5 0\nEOF\n"))
+    np.testing.assert_array_equal(instance.coords, [[0, 0], [2.5, 0]])
+    # TSPLIB rounds halves up, not to the even neighbour
+    np.testing.assert_array_equal(instance_distances(instance), [[0, 3], [3, 0]])
+
+
+def test_csv_with_header_uses_named_columns():
+    instance = read_csv(io.StringIO("name,y,x\nA,1,2\nB,3,4.5\n"))
+    np.testing.assert_array_equal(instance.coords, [[2, 1], [4.5, 3]])
+    assert instance.names == ["A", "B"]
+
+
+def test_csv_without_header_keeps_the_first_row():
+    instance = read_csv(io.StringIO("1,2\n3,4.5\n-1e3,0\n"))
+    np.testing.assert_array_equal(instance.coords, [[1, 2], [3, 4.5], [-1000, 0]])
+    assert instance.names is None
+
+
+@pytest.mark.filterwarnings("ignore:loadtxt")
+def test_csv_of_one_city_without_header():
+    np.testing.assert_array_equal(read_csv(io.StringIO("1,2\n")).coords, [[1, 2]])
+
+
+def test_csv_header_without_coordinate_columns_raises():
+    with pytest.raises(ValueError, match="'x' and 'y'"):
+        read_csv(io.StringIO("a,b\n1,2\n"))
+
+
+def test_load_instance_picks_the_reader_from_the_extension(tmp_path):
+    path = tmp_path / "cities.csv"
+    path.write_text("x,y\n0,0\n1,1\n")
+    np.testing.assert_array_equal(load_instance(str(path)).coords, [[0, 0], [1, 1]])
+    with pytest.raises(ValueError, match="unknown instance format"):
+        load_instance(str(tmp_path / "cities.json"))
@@ -0,0 +1,79 @@
+import threading
+
+import pytest
+
+from ga.jobs import CANCELLED, DONE, JobRunner, follow, job_columns
+from ga.progress import GenerationEvent
+
+#jobs run on worker threads, so every run here waits on events it is handed
+#instead of sleeping, and follow() waits for the outcome
+
+
+def gated_run(started, release, n_generations=1000, callback=None):
+    # reports one generation, then waits until released before the rest
+    started.set()
+    callback(GenerationEvent(0, 1.0, None, False))
+    release.wait(5)
+    for generation in range(1, n_generations + 1):
+        callback(GenerationEvent(generation, 1.0 / (generation + 1), None, generation == n_generations))
+    return n_generations
+
+
+@pytest.fixture
+def runner():
+    runner = JobRunner(max_workers=1)
+    yield runner
+    runner.shutdown()
+
+
+def test_cancel_running_job(runner):
+    started, release = threading.Event(), threading.Event()
+    job_id = runner.submit(gated_run, started, release)
+    assert started.wait(5)
+    assert runner.cancel(job_id)
+    release.set()
+    status = follow(job_id, runner=runner, interval=0.01, timeout=5)
+    assert status.state == CANCELLED and status.result is None
+    # the run stopped at its next generation
+    assert status.event.generation == 0
+
+
+def test_cancel_queued_job(runner):
+    started, release = threading.Event(), threading.Event()
+    blocking = runner.submit(gated_run, started, release, 5)
+    queued = runner.submit(gated_run, threading.Event(), threading.Event())
+    assert started.wait(5)
+    assert runner.cancel(queued)
+    release.set()
+    assert follow(queued, runner=runner, interval=0.01, timeout=5).state == CANCELLED
+    assert follow(blocking, runner=runner, interval=0.01, timeout=5).state == DONE
+    assert runner.status(queued).event is None
+
+
+def test_shared_job_runs_until_every_submitter_cancels(runner):
+    started, release = threading.Event(), threading.Event()
+    job_id = runner.submit(gated_run, started, release, 5, key="request")
+    assert runner.submit(gated_run, started, release, 5, key="request") == job_id
+    assert started.wait(5)
+    assert not runner.cancel(job_id)
+    release.set()
+    assert follow(job_id, runner=runner, interval=0.01, timeout=5).state == DONE
+
+
+def test_job_columns_hold_every_generation(runner):
+    started, release = threading.Event(), threading.Event()
+    release.set()
+    job_id = runner.submit(gated_run, started, release, 300)
+    seen = []
+    status = follow(job_id, seen.append, runner=runner, interval=0.01, timeout=5)
+    assert status.state == DONE and status.result == 300
+    generations, fitness = job_columns(job_id, runner)()
+    assert generations == list(range(301)) and fitness[-1] == pytest.approx(1 / 301)
+    # polling only sees some of them
+    assert 1 <= len(seen) <= 301 and seen[-1].done
+
+
+def test_unknown_job(runner):
+    assert follow("missing", runner=runner) is None
+    assert job_columns("missing", runner) is None
+    assert not runner.cancel("missing")